@@ -0,0 +1,228 @@
+"""
+Replays the reserve history of a Uniswap V2 pair to calculate the TWAP that
+UniswapOracle would have returned for any snapshot and settlement time
+
+The pair's cumulative prices are rebuilt from its `Sync` events the same way
+`UniswapV2Pair._update` accumulates them and `getPrice` is evaluated with the
+same integer arithmetic as the contract, including `baseMultiplier`,
+`quoteMultiplier` and `isInverted`. Prices are returned in wei like the
+contract. Queries are vectorized with numpy object arrays of python ints so a
+whole grid of windows can be priced at once, e.g.
+`backtester.get_price(snapshot_times[:, None], settlement_times[None, :])`
+
+Cumulative prices start at 0 at the first update instead of the pair's actual
+value. This doesn't affect TWAPs since only differences are used, but windows
+must start after the first update
+
+`manipulate` returns a copy of the history where the price was moved during
+some period, e.g. to check how much an attacker could move the settlement price
+
+Usage:
+>> brownie run backtest_twap main <pair> <from_block> <to_block> [<is_inverted>] --network mainnet
+
+"""
+
+import math
+
+import numpy as np
+from brownie import interface
+
+from scripts.event_logs import get_event_abis, get_logs
+from scripts.rpc_batch import batch_call, get_block_timestamps
+
+
+SCALE = 10 ** 18
+Q112 = 1 << 112
+
+# TWAP window lengths in seconds compared by `main`
+WINDOWS = [10 * 60, 30 * 60, 60 * 60, 4 * 60 * 60, 24 * 60 * 60]
+
+# time between settlement times compared by `main`
+SETTLEMENT_INTERVAL = 60 * 60
+
+SYNC_ABI = {
+    "anonymous": False,
+    "inputs": [
+        {"indexed": False, "name": "reserve0", "type": "uint112"},
+        {"indexed": False, "name": "reserve1", "type": "uint112"},
+    ],
+    "name": "Sync",
+    "type": "event",
+}
+
+
+def calc_multipliers(decimals0, decimals1, is_inverted):
+    """
+    Same as the UniswapOracle constructor
+    """
+    mn = min(decimals0, decimals1)
+    decimals0, decimals1 = decimals0 - mn, decimals1 - mn
+    base_multiplier = 10 ** (decimals1 if is_inverted else decimals0)
+    quote_multiplier = 10 ** (decimals0 if is_inverted else decimals1)
+    return base_multiplier, quote_multiplier
+
+
+class TwapBacktester:
+    def __init__(
+        self, timestamps, reserve0, reserve1, decimals0, decimals1, is_inverted
+    ):
+        """
+        `timestamps` are the block timestamps of reserve updates in ascending
+        order and `reserve0` and `reserve1` the reserves after each update. Only
+        the last update for each timestamp is used since the pair only
+        accumulates prices once per block
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        last = np.append(timestamps[1:] != timestamps[:-1], True)
+        if np.any(np.diff(timestamps) < 0):
+            raise ValueError("Timestamps must be in ascending order")
+
+        self.timestamps = timestamps[last]
+        self.reserve0 = np.asarray(reserve0, dtype=object)[last]
+        self.reserve1 = np.asarray(reserve1, dtype=object)[last]
+        self.decimals0 = decimals0
+        self.decimals1 = decimals1
+        self.is_inverted = is_inverted
+        self.base_multiplier, self.quote_multiplier = calc_multipliers(
+            decimals0, decimals1, is_inverted
+        )
+
+        # `price0CumulativeLast` accumulates reserve1 / reserve0 in uq112x112 and
+        # `price1CumulativeLast` accumulates reserve0 / reserve1
+        self.base = self.reserve0 if is_inverted else self.reserve1
+        self.quote = self.reserve1 if is_inverted else self.reserve0
+        elapsed = np.diff(self.timestamps).astype(object)
+        increments = (self.base[:-1] * Q112) // self.quote[:-1] * elapsed
+        self.cumulative = np.concatenate([[0], np.cumsum(increments)]).astype(object)
+
+    def fetch_spot_and_cumulative_price(self, times):
+        """
+        Same as `fetchSpotAndCumulativePrice` for each of `times`
+        """
+        times = np.asarray(times, dtype=np.int64)
+        i = np.searchsorted(self.timestamps, times, side="right") - 1
+        if np.any(i < 0):
+            raise ValueError("Times must be after the first reserve update")
+
+        base, quote = self.base[i], self.quote[i]
+        spot = base * SCALE * self.base_multiplier // quote // self.quote_multiplier
+
+        elapsed = (times - self.timestamps[i]).astype(object)
+        cumulative = self.cumulative[i] + elapsed * Q112 * base // quote
+        return spot, cumulative
+
+    def get_price(self, snapshot_times, times):
+        """
+        TWAP returned by `getPrice` at `times` if `takeSnapshot` was last called
+        at `snapshot_times`. Arguments are broadcast against each other
+
+        Note that `getPrice` multiplies and divides the TWAP by `SCALE`, so
+        unlike the spot price returned when no time has elapsed, it isn't
+        scaled by 10^18. This is reproduced here so results match the contract
+        """
+        snapshot_times, times = np.broadcast_arrays(
+            np.asarray(snapshot_times, dtype=np.int64),
+            np.asarray(times, dtype=np.int64),
+        )
+        if np.any(snapshot_times > times):
+            raise ValueError("Snapshot must be taken before the price is fetched")
+
+        shape = times.shape
+        _, snapshot_cumulative = self.fetch_spot_and_cumulative_price(
+            snapshot_times.ravel()
+        )
+        spot, cumulative = self.fetch_spot_and_cumulative_price(times.ravel())
+
+        # if no time has elapsed, just use the current spot price
+        elapsed = (times.ravel() - snapshot_times.ravel()).astype(object)
+        diff = cumulative - snapshot_cumulative
+        twap = (
+            diff
+            * SCALE
+            * self.base_multiplier
+            // Q112
+            // np.where(elapsed == 0, 1, elapsed)
+            // SCALE
+            // self.quote_multiplier
+        )
+        return np.where(elapsed == 0, spot, twap).reshape(shape)
+
+    def manipulate(self, start, end, factor):
+        """
+        Copy of this history where the price of token0 in terms of token1 is
+        multiplied by `factor` from `start` until `end`, keeping the product of
+        the reserves constant like a trade would, and then moved back
+        """
+        timestamps = list(self.timestamps)
+        reserve0, reserve1 = list(self.reserve0), list(self.reserve1)
+
+        # reserves at start and end before manipulating
+        for t in [start, end]:
+            i = np.searchsorted(timestamps, t, side="right") - 1
+            if i < 0:
+                raise ValueError("Times must be after the first reserve update")
+            if timestamps[i] != t:
+                timestamps.insert(i + 1, t)
+                reserve0.insert(i + 1, reserve0[i])
+                reserve1.insert(i + 1, reserve1[i])
+
+        sqrt = math.sqrt(factor)
+        for i, t in enumerate(timestamps):
+            if start <= t < end:
+                reserve0[i] = int(reserve0[i] / sqrt)
+                reserve1[i] = int(reserve1[i] * sqrt)
+
+        return TwapBacktester(
+            timestamps,
+            reserve0,
+            reserve1,
+            self.decimals0,
+            self.decimals1,
+            self.is_inverted,
+        )
+
+
+def load(pair, from_block, to_block, is_inverted):
+    pair = interface.IUniswapV2Pair(pair)
+    decimals0, decimals1 = batch_call(
+        (token, interface.IERC20Detailed.abi, "decimals", ())
+        for token in [pair.token0(), pair.token1()]
+    )
+
+    logs = []
+    events = get_event_abis([SYNC_ABI], ["Sync"])
+    for _, chunk in get_logs([pair.address], events, from_block, to_block):
+        logs.extend(chunk)
+    if not logs:
+        raise ValueError("No reserve updates in block range")
+
+    timestamps = get_block_timestamps(sorted(set(log["blockNumber"] for log in logs)))
+    return TwapBacktester(
+        [timestamps[log["blockNumber"]] for log in logs],
+        [log["args"]["reserve0"] for log in logs],
+        [log["args"]["reserve1"] for log in logs],
+        decimals0,
+        decimals1,
+        is_inverted,
+    )
+
+
+def main(pair, from_block, to_block, is_inverted="false"):
+    is_inverted = is_inverted.lower() in ["1", "true"]
+    backtester = load(pair, int(from_block), int(to_block), is_inverted)
+
+    # settle at regular intervals once the longest window fits in the history
+    first, last = backtester.timestamps[0], backtester.timestamps[-1]
+    times = np.arange(first + max(WINDOWS), last + 1, SETTLEMENT_INTERVAL)
+    spot, _ = backtester.fetch_spot_and_cumulative_price(times)
+    spot = spot.astype(float)
+
+    print(f"{len(times)} settlement times. Deviation of TWAP from spot price")
+    print(f"{'window':>8} {'mean':>8} {'95%':>8} {'max':>8}")
+    for window in WINDOWS:
+        twap = backtester.get_price(times - window, times).astype(float)
+        deviation = np.abs(twap / spot - 1)
+        print(
+            f"{window // 60:>7}m {deviation.mean():>8.2%} "
+            f"{np.percentile(deviation, 95):>8.2%} {deviation.max():>8.2%}"
+        )
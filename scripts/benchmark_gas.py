@@ -0,0 +1,305 @@
+"""
+Measures gas used by market-maker and rewards operations in different market
+states on a development chain and compares it against a saved baseline. Exits
+with an error if any operation uses more gas than its baseline by more than
+`threshold`. If there is no baseline yet, the results are saved as the
+baseline with a warning
+
+Usage:
+>> brownie run benchmark_gas
+>> brownie run benchmark_gas main 0.05
+>> brownie run benchmark_gas update_baseline
+"""
+
+import json
+import os
+import sys
+from math import log
+
+from brownie import (
+    accounts,
+    chain,
+    MockOracle,
+    MockToken,
+    OptionsMarketMaker,
+    OptionsToken,
+    SeedRewards,
+    StakingRewards,
+)
+
+
+BASELINE_PATH = "gas_baseline.json"
+
+# fail if an operation uses this much more gas than in the baseline
+THRESHOLD = 0.02
+
+
+# constants
+SCALE = 10 ** 18
+DAYS = 24 * 60 * 60
+ALPHA = int(SCALE // 10 // 2 / log(2))
+STRIKE_PRICE = 100 * SCALE
+SETTLEMENT_PRICE = 110 * SCALE
+MAX_AMOUNT = 10 ** 30
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+CALL = 0
+PUT = 1
+
+# markets as (isPut, isETH)
+MARKETS = {
+    "call": (CALL, False),
+    "put": (PUT, False),
+    "ethcall": (CALL, True),
+}
+
+# long and short supply before each operation
+STATES = {
+    "empty": (0, 0),
+    "balanced": (10 * SCALE, 10 * SCALE),
+    "skewed": (50 * SCALE, SCALE // 10),
+}
+
+# quantity bought, sold or staked in each operation
+TRADE_SIZE = SCALE
+
+
+def deploy_market(deployer, base_token, oracle, is_put, expiry_time):
+    mm = deployer.deploy(OptionsMarketMaker)
+    longToken = deployer.deploy(OptionsToken)
+    shortToken = deployer.deploy(OptionsToken)
+
+    longToken.initialize(mm, "long name", "long symbol", 18)
+    shortToken.initialize(mm, "short name", "short symbol", 18)
+    mm.initialize(
+        base_token,
+        oracle,
+        is_put,
+        STRIKE_PRICE,
+        ALPHA,
+        expiry_time,
+        longToken,
+        shortToken,
+    )
+    return mm
+
+
+def start_rewards(deployer, rewards, rewards_token):
+    rewards.setRewardsDuration(10 * DAYS, {"from": deployer})
+    rewards_token.mint(rewards, 1000 * SCALE, {"from": deployer})
+    rewards.notifyRewardAmount(1000 * SCALE, {"from": deployer})
+
+
+def deploy(deployer, user):
+    oracle = deployer.deploy(MockOracle)
+    oracle.setPrice(SETTLEMENT_PRICE)
+
+    base_token = deployer.deploy(MockToken)
+    rewards_token = deployer.deploy(MockToken)
+    expiry_time = chain.time() + 30 * DAYS
+
+    markets = {}
+    for name, (is_put, is_eth) in MARKETS.items():
+        token = ZERO_ADDRESS if is_eth else base_token
+        mm = deploy_market(deployer, token, oracle, is_put, expiry_time)
+        pool = deployer.deploy(SeedRewards, mm, deployer, deployer, rewards_token)
+        start_rewards(deployer, pool, rewards_token)
+        markets[name] = mm, pool
+
+    base_token.mint(user, MAX_AMOUNT, {"from": deployer})
+    for mm, pool in markets.values():
+        base_token.approve(mm, MAX_AMOUNT, {"from": user})
+        base_token.approve(pool, MAX_AMOUNT, {"from": user})
+
+    staking_token = deployer.deploy(MockToken)
+    sr = deployer.deploy(
+        StakingRewards, deployer, deployer, rewards_token, staking_token
+    )
+    start_rewards(deployer, sr, rewards_token)
+
+    staking_token.mint(user, MAX_AMOUNT, {"from": deployer})
+    staking_token.approve(sr, MAX_AMOUNT, {"from": user})
+    return markets, sr
+
+
+def params(mm, user, value):
+    if mm.baseToken() == ZERO_ADDRESS:
+        return {"from": user, "value": value}
+    return {"from": user}
+
+
+def quote(mm, user, long_shares, short_shares):
+    """
+    Exact cost of buying so that eth is sent without a refund
+    """
+    p = params(mm, user, user.balance())
+    return mm.buy.call(long_shares, short_shares, MAX_AMOUNT, p)
+
+
+def buy(mm, user, long_shares, short_shares):
+    amount = quote(mm, user, long_shares, short_shares)
+    return mm.buy(long_shares, short_shares, amount, params(mm, user, amount))
+
+
+def stake(mm, pool, user, shares):
+    amount = quote(mm, user, shares, shares)
+    return pool.stake(shares, amount, params(mm, user, amount))
+
+
+def set_state(mm, user, state):
+    long_supply, short_supply = STATES[state]
+    if long_supply > 0 or short_supply > 0:
+        buy(mm, user, long_supply, short_supply)
+
+
+def expire(mm):
+    chain.sleep(mm.expiryTime() - chain.time() + 1)
+
+
+def market_benchmarks(mm, pool, user, state):
+    """
+    Yields (operation, setup, run) for each operation on a market. `setup` is
+    called on a fresh chain to get to `state` and `run` returns the transaction
+    to be measured
+    """
+
+    def setup():
+        set_state(mm, user, state)
+
+    def setup_staked():
+        setup()
+        stake(mm, pool, user, TRADE_SIZE)
+        chain.sleep(DAYS)
+
+    def setup_expired():
+        setup()
+        expire(mm)
+
+    def setup_settled():
+        setup_expired()
+        mm.settle({"from": user})
+
+    yield "buy", setup, lambda: buy(mm, user, TRADE_SIZE, 0)
+    yield "settle", setup_expired, lambda: mm.settle({"from": user})
+    yield "SeedRewards.stake", setup, lambda: stake(mm, pool, user, TRADE_SIZE)
+    yield "SeedRewards.withdraw", setup_staked, lambda: pool.withdraw(
+        TRADE_SIZE, 0, {"from": user}
+    )
+    yield "SeedRewards.exit", setup_staked, lambda: pool.exit(0, {"from": user})
+
+    # user needs to hold options to sell or redeem them
+    if state != "empty":
+        yield "sell", setup, lambda: mm.sell(TRADE_SIZE, 0, 0, {"from": user})
+        yield "redeem", setup_settled, lambda: mm.redeem({"from": user})
+
+
+def staking_benchmarks(sr, user):
+    def setup_staked():
+        sr.stake(TRADE_SIZE, {"from": user})
+        chain.sleep(DAYS)
+
+    def run_stake():
+        return sr.stake(TRADE_SIZE, {"from": user})
+
+    yield "stake/first", lambda: None, run_stake
+    yield "stake/again", setup_staked, run_stake
+    yield "getReward", setup_staked, lambda: sr.getReward({"from": user})
+
+
+def run_benchmarks():
+    deployer, user = accounts[:2]
+    markets, sr = deploy(deployer, user)
+
+    # every operation is measured from the same snapshot so results don't
+    # depend on the order they are run in
+    chain.snapshot()
+
+    benchmarks = []
+    for name, (mm, pool) in markets.items():
+        for state in STATES:
+            for op, setup, run in market_benchmarks(mm, pool, user, state):
+                if "." not in op:
+                    op = "OptionsMarketMaker." + op
+                benchmarks.append((f"{op}/{name}/{state}", setup, run))
+
+    for op, setup, run in staking_benchmarks(sr, user):
+        benchmarks.append(("StakingRewards." + op, setup, run))
+
+    results = {}
+    for key, setup, run in benchmarks:
+        chain.revert()
+        setup()
+        results[key] = run().gas_used
+    chain.revert()
+    return dict(sorted(results.items()))
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints a table of gas used compared to the baseline and returns the
+    operations whose gas increased by more than `threshold`
+    """
+    regressions = []
+    print(f"{'operation':<50} {'gas':>9} {'baseline':>9} {'change':>8}")
+    for key, gas in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<50} {gas:>9} {'-':>9} {'new':>8}")
+            continue
+
+        change = gas / base - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  <-- regression"
+        print(f"{key:<50} {gas:>9} {base:>9} {change:>+8.2%}{flag}")
+
+    for key in baseline:
+        if key not in results:
+            print(f"{key:<50} {'-':>9} {baseline[key]:>9} {'removed':>8}")
+    return regressions
+
+
+def main(threshold=THRESHOLD):
+    threshold = float(threshold)
+
+    baseline = load_baseline(BASELINE_PATH)
+    results = run_benchmarks()
+
+    # nothing to compare against, e.g. on a fresh checkout
+    if baseline is None:
+        compare(results, {}, float("inf"))
+        save_baseline(BASELINE_PATH, results)
+        print(
+            f"Warning: no baseline found at {BASELINE_PATH}. Saved these results "
+            "as the baseline, commit it to check future runs against it",
+            file=sys.stderr,
+        )
+        return
+
+    regressions = compare(results, baseline, threshold)
+    if regressions:
+        sys.exit(
+            f"{len(regressions)} operations used more than {threshold:.0%} "
+            f"more gas than in {BASELINE_PATH}"
+        )
+
+
+def update_baseline():
+    results = run_benchmarks()
+    compare(results, load_baseline(BASELINE_PATH) or {}, float("inf"))
+    save_baseline(BASELINE_PATH, results)
+    print(f"Saved results to {BASELINE_PATH}")
@@ -11,14 +11,26 @@ liquidity_param describes maximum possible sum of prices - 1. It's equal to alph
 
 Answer is multipled by 10^18 and printed as an integer
 
+`batch_cost` evaluates the same cost function over numpy arrays of long supply,
+short supply and alpha in float64. Points which float64 can't represent are
+recomputed with `cost`
+
 """
 
 import mpmath
+import numpy as np
 from mpmath import exp, log, mpf
 
 
 U = 10 ** 18
-mpmath.prec = 300
+mpmath.mp.prec = 300
+
+# integers above this can't be represented exactly in float64
+MAX_EXACT_INT = 2 ** 53
+
+# supplies that differ by less than this fraction of the larger one lose most of
+# the digits of their difference when they're rounded to float64
+NEAR_EQUAL = 1e-8
 
 
 def cost(q, alpha):
@@ -30,6 +42,56 @@ def cost(q, alpha):
     return mx + b * log(a)
 
 
+def batch_cost(q1, q2, alpha):
+    """
+    Vectorized version of `cost` for two outcomes
+
+    Arguments are broadcast against each other so a whole grid of supply states
+    can be priced at once, e.g. `batch_cost(q1[:, None], q2[None, :], alpha)`.
+    Uses the same overflow-safe form as `cost`, i.e. max + b * log(1 + exp((min - max) / b))
+
+    Points where float64 isn't reliable fall back to the high-precision `cost`.
+    That's when `b` underflows to 0 or loses precision as a subnormal, when the
+    result overflows, and when integer supplies above 2^53 are so close that
+    rounding them to float64 loses most of the digits of the spread
+    `max - min` in the exponent. Returns a float64 array in the same units as
+    the inputs
+    """
+    q1, q2, alpha = np.broadcast_arrays(q1, q2, alpha)
+    f1, f2, falpha = (np.asarray(x, dtype=np.float64) for x in (q1, q2, alpha))
+
+    with np.errstate(all="ignore"):
+        b = falpha * (f1 + f2)
+        mx = np.maximum(f1, f2)
+        mn = np.minimum(f1, f2)
+        ans = mx + b * np.log1p(np.exp((mn - mx) / b))
+
+        # initial state of the AMM. matches `cost` which returns 0 when b is 0
+        initial = (f1 + f2 == 0) | (falpha == 0)
+        ans = np.where(initial, 0.0, ans)
+
+    # fall back to mpmath where float64 overflowed or underflowed
+    fallback = ~initial & (~np.isfinite(ans) | (b < np.finfo(np.float64).tiny))
+    fallback |= ~initial & ~np.isfinite(b)
+
+    # float inputs are already exact so only integers can be rounded
+    if not all(np.issubdtype(x.dtype, np.floating) for x in (q1, q2)):
+        rounded = mx > MAX_EXACT_INT
+        fallback |= ~initial & rounded & (mx - mn <= NEAR_EQUAL * mx)
+
+    for i in map(tuple, np.argwhere(fallback)):
+        q = [mpf(to_exact(q1[i])), mpf(to_exact(q2[i]))]
+        ans[i] = float(cost(q, mpf(to_exact(alpha[i]))))
+    return ans
+
+
+def to_exact(x):
+    """
+    Python int or float, which mpmath converts exactly unlike numpy scalars
+    """
+    return int(x) if isinstance(x, (int, np.integer)) else float(x)
+
+
 if __name__ == "__main__":
     import sys
 
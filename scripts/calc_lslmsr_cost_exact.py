@@ -0,0 +1,73 @@
+"""
+Integer-only port of OptionsMarketMaker.calcLsLmsrCost and OptionsMarketMaker.cost
+
+Returns exactly the same value as the contract, including the rounding of the
+ABDKMath64x64 approximations of exp and log, so costs can be calculated
+locally without calling the contract. Arguments and answer are in wei, i.e.
+the answer is multiplied by 10^18 like in the contract
+
+Usage:
+>> python -m scripts.calc_lslmsr_cost_exact <q1> <q2> <alpha>
+
+"""
+
+from scripts import abdk_math_64x64 as abdk
+from scripts import safe_math
+
+
+SCALE = 10 ** 18
+SCALE_SQ = 10 ** 36
+
+
+def calc_lslmsr_cost(q1, q2, alpha):
+    # b = alpha * (q1 + q2)
+    b = safe_math.mul(safe_math.add(q1, q2), alpha)
+
+    # if b is 0 then q1 and q2 must be 0 so the AMM is in its initial state
+    if b == 0:
+        return 0
+
+    # max(q1, q2)
+    mx = max(q1, q2)
+
+    # abs(q1 - q2)
+    diff = safe_math.sub(mx, min(q1, q2))
+
+    # abs(q1 - q2) / b
+    div = abdk.divu(safe_math.mul(diff, SCALE), b)
+
+    # exp(abs(q1 - q2) / b)
+    exp = abdk.exp(abdk.neg(div))
+
+    # log(1 + exp(abs(q1 - q2) / b))
+    log = abdk.ln(abdk.add(exp, 1 << 64))
+
+    # b * log(1 + exp(abs(q1 - q2) / b)) + max(q1, q2)
+    return safe_math.add(abdk.mulu(log, b), safe_math.mul(mx, SCALE))
+
+
+def cost(long_supply, short_supply, alpha, is_put=False, strike_price=None):
+    """
+    Amount of base tokens held by a market with the given token supplies
+    """
+    lslmsr_cost = calc_lslmsr_cost(long_supply, short_supply, alpha)
+
+    # multiply by the strike price for puts
+    if is_put:
+        return safe_math.div(safe_math.mul(lslmsr_cost, strike_price), SCALE_SQ)
+    return safe_math.div(lslmsr_cost, SCALE)
+
+
+def batch_calc_lslmsr_cost(q1s, q2s, alpha):
+    """
+    Calculate `calc_lslmsr_cost` for each pair of long supply `q1s[i]` and short
+    supply `q2s[i]` with the same `alpha`
+    """
+    return [calc_lslmsr_cost(q1, q2, alpha) for q1, q2 in zip(q1s, q2s)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    _, q1, q2, alpha = sys.argv
+    print(calc_lslmsr_cost(int(q1), int(q2), int(alpha)))
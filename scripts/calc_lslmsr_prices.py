@@ -1,41 +1,77 @@
 """
-Implementation of cost function described in Othman et al., 2013
+Implementation of marginal prices of cost function described in Othman et al., 2013
 
 This script can be used to double check numerical values in OptionsMarketMaker
 unit tests
 
 Usage:
->> python calc_lslmsr_cost.py <q1> <q2> <liquidity_param>
+>> python calc_lslmsr_prices.py <q1> <q2> <liquidity_param>
 
 liquidity_param describes maximum possible sum of prices - 1. It's equal to alpha * 2 log 2
 
+Prices are the partial derivatives of the cost function C(q) = b * log(sum(exp(q_j / b)))
+with b = alpha * sum(q)
+
+  p_i = alpha * log(sum(exp(q_j / b))) + (Q * exp(q_i / b) - sum(q_j * exp(q_j / b))) / (Q * sum(exp(q_j / b)))
+
+where Q = sum(q). The first term is the liquidity-sensitivity term which makes
+prices sum to more than 1. With w_j = exp((q_j - max(q)) / b) / sum(exp((q_k - max(q)) / b))
+this can be evaluated without overflow as
+
+  p_i = alpha * log(sum(exp((q_j - max(q)) / b))) + w_i + sum(w_j * (max(q) - q_j)) / Q
+
 """
 
 import mpmath
+import numpy as np
 from mpmath import exp, log, mpf
 
 
-mpmath.prec = 300
+mpmath.mp.prec = 300
+
 
+def prices(q, alpha):
+    n = len(q)
+    Q = sum(q)
+    if Q == 0:
+        # cost is not differentiable at the origin. use the one-sided
+        # derivative when buying outcome i from the initial state
+        return [1 + alpha * log(1 + (n - 1) * exp(-1 / alpha))] * n
 
-def cost(q, alpha):
-    b = alpha * sum(q)
-    if b == 0:
-        return 0
+    b = alpha * Q
     mx = max(q)
-    a = sum(exp((x - mx) / b) for x in q)
-    return mx + b * log(a)
-
-
-def prices(q, alpha, eps=1e-9):
-    prices = []
-    for i in range(len(q)):
-        c1 = cost(q, alpha)
-        q[i] += eps
-        c2 = cost(q, alpha)
-        q[i] -= eps
-        prices.append((c2 - c1) / eps)
-    return prices
+    e = [exp((x - mx) / b) for x in q]
+    a = sum(e)
+    spread = alpha * log(a) + sum(ei * (mx - x) for ei, x in zip(e, q)) / a / Q
+    return [ei / a + spread for ei in e]
+
+
+def batch_prices(q, alpha):
+    """
+    Vectorized version of `prices`
+
+    `q` has shape (..., n) where the last axis indexes the n outcomes and the
+    leading axes index supply vectors. `alpha` is broadcast against the leading
+    axes. Returns a float64 array with the same shape as `q`
+    """
+    q = np.asarray(q, dtype=np.float64)
+    alpha = np.asarray(alpha, dtype=np.float64)[..., None]
+    n = q.shape[-1]
+
+    Q = q.sum(axis=-1, keepdims=True)
+    b = alpha * Q
+    mx = q.max(axis=-1, keepdims=True)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        e = np.exp((q - mx) / b)
+        a = e.sum(axis=-1, keepdims=True)
+        w = e / a
+        spread = alpha * np.log(a) + (w * (mx - q)).sum(axis=-1, keepdims=True) / Q
+        ans = w + spread
+
+        # see `prices` for the initial state
+        initial = 1 + alpha * np.log1p((n - 1) * np.exp(-1 / alpha))
+    return np.where(Q == 0, initial, ans)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""
+Calculates what every holder of a market's options receives from `redeem`
+
+Uses the same integer arithmetic as OptionsMarketMaker.calcPayoff, including
+the inversion of the strike and settlement prices for puts, so results match
+the contract to the wei. All holders are calculated at once with numpy object
+arrays of python ints instead of one `calcPayoff` call per holder
+
+Payouts are calculated against the same balance and supplies, i.e. as if each
+holder were the first to redeem. Since payouts are rounded down, redeeming
+never decreases the payout per share of the remaining holders, so these are
+lower bounds on the actual payouts and their sum never exceeds the balance
+
+Holder balances are read from a json file mapping each address to its long
+and short balance in wei, as printed by `index_holders`. If the market hasn't
+been settled yet, the current oracle price is used as the settlement price
+
+Usage:
+>> brownie run calc_payouts main <market> <balances.json> --network mainnet
+
+"""
+
+import json
+import sys
+
+import numpy as np
+from brownie import interface, OptionsMarketMaker, OptionsToken
+
+from scripts import safe_math
+
+
+SCALE_SQ = 10 ** 36
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+def invert_if_put(x, is_put):
+    return safe_math.div(SCALE_SQ, x) if is_put else x
+
+
+def calc_payoffs_per_share(settlement_price, strike_price, is_put):
+    """
+    p1 = max(S - K, 0) and p2 = min(S, K) with S and K normalized like in the
+    contract
+    """
+    s = invert_if_put(settlement_price, is_put)
+    k = invert_if_put(strike_price, is_put)
+    return (safe_math.sub(s, k) if s > k else 0), min(s, k)
+
+
+def _check(x):
+    if len(x) > 0 and max(x) > safe_math.UINT256_MAX:
+        raise safe_math.Revert()
+    return x
+
+
+def calc_payouts(
+    long_balances,
+    short_balances,
+    balance,
+    long_supply,
+    short_supply,
+    settlement_price,
+    strike_price,
+    is_put,
+):
+    """
+    Vectorized `calcPayoff` for arrays of long and short balances. `balance`
+    is the amount of base tokens held by the market and `long_supply` and
+    `short_supply` are the total supplies of the options tokens
+
+    Returns an object array of python ints
+    """
+    p1, p2 = calc_payoffs_per_share(settlement_price, strike_price, is_put)
+    longs = np.asarray(long_balances, dtype=object)
+    shorts = np.asarray(short_balances, dtype=object)
+
+    # denom = q1 * p1 + q2 * p2
+    denom = safe_math.add(
+        safe_math.mul(p1, long_supply), safe_math.mul(p2, short_supply)
+    )
+
+    # denom is proportional to total payoff of shares held by everyone
+    # so if it's 0, payoff to any user must be 0
+    if denom == 0:
+        return np.zeros(len(longs), dtype=object)
+
+    # numer = B * (`longShares` * p1 + `shortShares` * p2)
+    payoffs = _check(_check(longs * p1) + _check(shorts * p2))
+    numer = _check(balance * payoffs)
+    return numer // denom
+
+
+def load_balances(path):
+    with open(path, "r") as f:
+        balances = json.load(f)
+    holders = sorted(balances)
+    longs = [int(balances[h][0]) for h in holders]
+    shorts = [int(balances[h][1]) for h in holders]
+    return holders, longs, shorts
+
+
+def main(market, path):
+    mm = OptionsMarketMaker.at(market)
+    holders, longs, shorts = load_balances(path)
+
+    settlement_price = mm.settlementPrice()
+    if not mm.isSettled():
+        settlement_price = interface.IOracle(mm.oracle()).getPrice()
+        print(f"Not settled. Using oracle price {settlement_price}", file=sys.stderr)
+
+    base_token = mm.baseToken()
+    if base_token == ZERO_ADDRESS:
+        balance = mm.balance()
+    else:
+        balance = interface.IERC20Detailed(base_token).balanceOf(mm)
+
+    long_supply = OptionsToken.at(mm.longToken()).totalSupply()
+    short_supply = OptionsToken.at(mm.shortToken()).totalSupply()
+    if sum(longs) != long_supply or sum(shorts) != short_supply:
+        print("Balances don't add up to total supply", file=sys.stderr)
+
+    payouts = calc_payouts(
+        longs,
+        shorts,
+        balance,
+        long_supply,
+        short_supply,
+        settlement_price,
+        mm.strikePrice(),
+        mm.isPutMarket(),
+    )
+
+    # contract reverts if payout is 0 so these holders can't redeem
+    unredeemable = sum(1 for p in payouts if p == 0)
+    print(
+        f"{len(holders)} holders, total payout {sum(payouts)} of balance "
+        f"{balance}, {unredeemable} with zero payout",
+        file=sys.stderr,
+    )
+    print(json.dumps(dict(zip(holders, map(str, payouts))), indent=4))
@@ -0,0 +1,191 @@
+"""
+Calculates how many options can be bought from OptionsMarketMaker for a given
+amount of base tokens, or how many have to be sold to receive a given amount
+
+This inverts the LS-LMSR cost function. First all amounts are solved at once
+in float64 with `newton.solve_bracketed`, using `batch_cost` for the cost
+and `batch_prices` for its derivative. Each estimate is then refined with
+`calc_lslmsr_cost_exact.cost`, so answers agree with the contract to the wei
+
+Usage:
+>> python -m scripts.calc_trade_size <buy|sell> <long|short> <long_supply> <short_supply> <alpha> <amount> [<amount> ...]
+
+Supplies, alpha and amounts are in wei. Only supports call markets from the command line
+
+"""
+
+import numpy as np
+
+from scripts.calc_lslmsr_cost import batch_cost
+from scripts.calc_lslmsr_cost_exact import SCALE, cost
+from scripts.calc_lslmsr_prices import batch_prices
+from scripts.newton import solve_bracketed
+
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-12
+
+
+def solve_float(q, index, alpha, targets, is_buy):
+    """
+    Solve C(q +/- s * e_index) - C(q) = +/- target for s >= 0 in float64
+
+    `q` is a pair of token supplies, `alpha` is dimensionless and `targets` is
+    an array of amounts in the same units as the cost function. Selling more
+    than `q[index]` is impossible so those targets return `q[index]`
+    """
+    sign = 1.0 if is_buy else -1.0
+    targets = np.atleast_1d(np.asarray(targets, dtype=np.float64))
+    q = np.asarray(q, dtype=np.float64)
+    direction = sign * np.eye(2)[index]
+    c0 = batch_cost(q[0], q[1], alpha)
+
+    def f(s):
+        qs = q + s[:, None] * direction
+        diff = sign * (batch_cost(qs[:, 0], qs[:, 1], alpha) - c0) - targets
+        return diff, batch_prices(qs, alpha)[:, index]
+
+    # f is increasing in s. when buying, C(q + s * e_index) >= q[index] + s
+    # gives an upper bound. when selling, can't sell more than the supply
+    lo = np.zeros_like(targets)
+    hi = (
+        np.maximum(targets + c0 - q[index], 0.0)
+        if is_buy
+        else np.full_like(targets, q[index])
+    )
+
+    return solve_bracketed(f, lo, hi, (lo + hi) / 2, TOLERANCE, MAX_ITERATIONS)
+
+
+def first_true(ok, guess, lo, hi):
+    """
+    Smallest integer s in [lo, hi] where `ok(s)` is true, searching outwards
+    from `guess`. `ok` should be monotonic and `ok(hi)` should be true
+    """
+    guess = min(max(guess, lo), hi)
+    step = max(guess >> 40, 1)
+    if ok(guess):
+        a, b = guess - step, guess
+        while a >= lo and ok(a):
+            b = a
+            step *= 2
+            a = b - step
+        a = max(a, lo - 1)
+    else:
+        a, b = guess, guess + step
+        while b < hi and not ok(b):
+            a = b
+            step *= 2
+            b = a + step
+        b = min(b, hi)
+
+    while b - a > 1:
+        m = (a + b) // 2
+        if ok(m):
+            b = m
+        else:
+            a = m
+    return b
+
+
+def calc_buy_shares(
+    long_supply,
+    short_supply,
+    alpha,
+    budgets,
+    is_long=True,
+    is_put=False,
+    strike_price=None,
+):
+    """
+    Maximum number of long or short options that can be bought with each of
+    `budgets` base tokens, i.e. the largest `shares` such that
+    `buy(shares, 0, budget)` or `buy(0, shares, budget)` would not revert with
+    "Max slippage exceeded"
+    """
+    index = 0 if is_long else 1
+    q = [long_supply, short_supply]
+    unit = strike_price if is_put else SCALE
+
+    def market_cost(s):
+        qs = list(q)
+        qs[index] += s
+        return cost(qs[0], qs[1], alpha, is_put, strike_price)
+
+    cost0 = market_cost(0)
+    estimates = solve_float(
+        np.array(q) / SCALE, index, alpha / SCALE, np.array(budgets) / unit, is_buy=True
+    )
+
+    shares = []
+    for budget, estimate in zip(budgets, estimates):
+        # cost is at least max(q) so buying past `hi` would always cost more than the budget
+        hi = max(-(-(budget + cost0 + 1) * SCALE // unit) - q[index], 0)
+        too_expensive = first_true(
+            lambda s: market_cost(s + 1) - cost0 > budget, int(estimate * SCALE), 0, hi
+        )
+        shares.append(too_expensive)
+    return shares
+
+
+def calc_sell_shares(
+    long_supply,
+    short_supply,
+    alpha,
+    amounts_out,
+    is_long=True,
+    is_put=False,
+    strike_price=None,
+):
+    """
+    Minimum number of long or short options that have to be sold to receive
+    each of `amounts_out` base tokens. Returns None for amounts that can't be
+    reached even by selling the whole supply
+    """
+    index = 0 if is_long else 1
+    q = [long_supply, short_supply]
+    unit = strike_price if is_put else SCALE
+
+    def market_cost(s):
+        qs = list(q)
+        qs[index] -= s
+        return cost(qs[0], qs[1], alpha, is_put, strike_price)
+
+    cost0 = market_cost(0)
+    estimates = solve_float(
+        np.array(q) / SCALE,
+        index,
+        alpha / SCALE,
+        np.array(amounts_out) / unit,
+        is_buy=False,
+    )
+
+    shares = []
+    for amount_out, estimate in zip(amounts_out, estimates):
+        if cost0 - market_cost(q[index]) < amount_out:
+            shares.append(None)
+            continue
+        enough = first_true(
+            lambda s: cost0 - market_cost(s) >= amount_out,
+            int(estimate * SCALE),
+            0,
+            q[index],
+        )
+        shares.append(enough)
+    return shares
+
+
+if __name__ == "__main__":
+    import sys
+
+    _, side, token, long_supply, short_supply, alpha, *amounts = sys.argv
+
+    calc = calc_buy_shares if side == "buy" else calc_sell_shares
+    ans = calc(
+        int(long_supply),
+        int(short_supply),
+        int(alpha),
+        [int(x) for x in amounts],
+        token == "long",
+    )
+    print(" ".join(str(x) for x in ans))
@@ -0,0 +1,147 @@
+"""
+Reads the prices of many ChainlinkOracle contracts with a few JSON-RPC batch
+requests instead of calling `getPrice` on each one
+
+The feeds of each oracle and the decimals of each feed never change, so they
+are fetched once and cached. Each read then fetches `latestRoundData` once for
+every feed used by any of the oracles and applies the same checks, scaling
+and composition of two feeds as `ChainlinkOracle.getPrice`, so oracles sharing
+a feed don't fetch it more than once
+
+Usage:
+>> brownie run chainlink_prices --network mainnet
+>> brownie run chainlink_prices main watch --network mainnet
+
+"""
+
+import time
+
+from brownie import interface, ChainlinkOracle
+
+from scripts.rpc_batch import BatchCallError, batch_call
+
+
+SCALE = 10 ** 18
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# seconds between reads in watch mode
+POLL_INTERVAL = 60
+
+
+class OracleError(Exception):
+    pass
+
+
+def calc_feed_price(round_data, decimals):
+    """
+    Same as `ChainlinkOracle.getPriceFromFeed`
+    """
+    _, price, _, timestamp, _ = round_data
+    if timestamp == 0:
+        raise OracleError("Round not complete")
+    if price <= 0:
+        raise OracleError("Price is not > 0")
+    return price * SCALE // 10 ** decimals
+
+
+def compose(feed_prices):
+    """
+    Same as `ChainlinkOracle.getPrice` given the prices of its feeds
+    """
+    price = SCALE
+    for feed_price in feed_prices:
+        price = price * feed_price // SCALE
+    return price
+
+
+class ChainlinkReader:
+    def __init__(self):
+        self.feeds = {}
+        self.decimals = {}
+
+    def load(self, oracles):
+        """
+        Fetch and cache feeds of `oracles` and decimals of the feeds. Returns a
+        dict mapping feeds whose `decimals` reverted to an `OracleError`. Those
+        aren't cached so they're fetched again next time
+        """
+        new_oracles = [o for o in oracles if o not in self.feeds]
+        results = batch_call(
+            (oracle, ChainlinkOracle.abi, name, ())
+            for oracle in new_oracles
+            for name in ["priceFeed1", "priceFeed2"]
+        )
+        for i, oracle in enumerate(new_oracles):
+            feeds = results[2 * i : 2 * i + 2]
+            self.feeds[oracle] = [f for f in feeds if f != ZERO_ADDRESS]
+
+        new_feeds = sorted(
+            set(f for o in oracles for f in self.feeds[o]) - set(self.decimals)
+        )
+        abi = interface.AggregatorV3Interface.abi
+        decimals = batch_call(
+            ((feed, abi, "decimals", ()) for feed in new_feeds), allow_failure=True
+        )
+
+        errors = {}
+        for feed, d in zip(new_feeds, decimals):
+            if isinstance(d, BatchCallError):
+                errors[feed] = OracleError(f"decimals failed: {d}")
+            else:
+                self.decimals[feed] = d
+        return errors
+
+    def get_prices(self, oracles, block_identifier="latest"):
+        """
+        Returns a dict mapping each oracle to its price, or to an `OracleError`
+        if `getPrice` would revert
+        """
+        oracles = [str(o) for o in oracles]
+        errors = self.load(oracles)
+
+        feeds = sorted(set(f for o in oracles for f in self.feeds[o]))
+        abi = interface.AggregatorV3Interface.abi
+        round_data = batch_call(
+            ((feed, abi, "latestRoundData", ()) for feed in feeds),
+            block_identifier,
+            allow_failure=True,
+        )
+
+        # a deprecated or broken feed only makes the oracles using it fail
+        feed_prices = {}
+        for feed, data in zip(feeds, round_data):
+            if feed in errors:
+                feed_prices[feed] = errors[feed]
+            elif isinstance(data, BatchCallError):
+                feed_prices[feed] = OracleError(f"latestRoundData failed: {data}")
+            else:
+                try:
+                    feed_prices[feed] = calc_feed_price(data, self.decimals[feed])
+                except OracleError as e:
+                    feed_prices[feed] = e
+
+        prices = {}
+        for oracle in oracles:
+            values = [feed_prices[f] for f in self.feeds[oracle]]
+            errors = [v for v in values if isinstance(v, OracleError)]
+            prices[oracle] = errors[0] if errors else compose(values)
+        return prices
+
+
+def main(mode=None):
+    oracles = [oracle.address for oracle in ChainlinkOracle]
+    reader = ChainlinkReader()
+
+    while True:
+        prices = reader.get_prices(oracles)
+        num_feeds = len(set(f for o in oracles for f in reader.feeds[o]))
+        print(f"{len(oracles)} oracles using {num_feeds} feeds")
+        for oracle, price in prices.items():
+            if isinstance(price, OracleError):
+                print(f"{oracle}: reverts with '{price}'")
+            else:
+                print(f"{oracle}: {price / SCALE:.8f}")
+
+        if mode != "watch":
+            break
+        time.sleep(POLL_INTERVAL)
@@ -54,16 +54,19 @@ FACTORY = {
 }
 
 
-def create_market(deployer, strike_price, is_put):
-    strike_wei = int(SCALE * strike_price)
-    alpha_wei = int(SCALE * LIQUIDITY_PARAM // 2 / log(2))
-
+def get_expiry():
     expiry = arrow.get(EXPIRY_DATE + " " + EXPIRY_TIME, "DD MMM YYYY HH:mm")
     if expiry < arrow.now():
         raise ValueError("Already expired")
 
     humanized = expiry.humanize(arrow.utcnow())
     print(f"Expiry: {expiry.isoformat()} ({humanized})")
+    return expiry
+
+
+def market_args(expiry, strike_price, is_put):
+    strike_wei = int(SCALE * strike_price)
+    alpha_wei = int(SCALE * LIQUIDITY_PARAM // 2 / log(2))
 
     expiry_code = expiry.format("DDMMMYYYY").upper()
     if is_put:
@@ -76,9 +79,7 @@ def create_market(deployer, strike_price, is_put):
     base_token = TOKEN_ADDRESSES[NETWORK][QUOTE_TOKEN if is_put else BASE_TOKEN]
     oracle = DEPLOYED_ORACLES[NETWORK][BASE_TOKEN + "/" + QUOTE_TOKEN]
 
-    # brownie doesn't let us use OptionsFactory.at
-    factory = Contract.from_explorer(FACTORY[NETWORK])
-    factory.createMarket(
+    return (
         base_token,
         oracle,
         is_put,
@@ -89,25 +90,56 @@ def create_market(deployer, strike_price, is_put):
         long_symbol,
         short_symbol,
         short_symbol,
-        {"from": deployer},
     )
 
-    # brownie doesn't let us see the transaction return value
-    address = factory.markets(factory.numMarkets() - 1)
-    print(f"Deployed at: {address}")
-    return OptionsMarketMaker.at(address)
+
+def get_market_address(deployer, tx):
+    # brownie doesn't let us see the transaction return value, but the new
+    # market emits `OwnershipTransferred` when the factory transfers it to us
+    for event in tx.events["OwnershipTransferred"]:
+        if event["newOwner"] == deployer:
+            return event.address
+    raise ValueError(f"No market created in {tx.txid}")
+
+
+def create_markets(deployer, factory, markets_args):
+    """
+    Submit all `createMarket` transactions back-to-back without waiting for
+    each one to be mined, then wait for all of them
+    """
+    nonce = deployer.nonce
+    txs = []
+    for i, args in enumerate(markets_args):
+        tx = factory.createMarket(
+            *args, {"from": deployer, "nonce": nonce + i, "required_confs": 0}
+        )
+        txs.append(tx)
+
+    markets = []
+    for tx in txs:
+        tx.wait(1)
+        address = get_market_address(deployer, tx)
+        print(f"Deployed at: {address}")
+        markets.append(OptionsMarketMaker.at(address))
+    return markets
 
 
 def main():
     deployer = accounts.load(ACCOUNT)
     balance = deployer.balance()
 
-    markets = []
-    for strike_price in STRIKE_PRICES:
-        for is_put in [False, True]:
-            market = create_market(deployer, strike_price, is_put)
-            markets.append(market)
-            # deploy_seed_rewards(deployer, market)
+    expiry = get_expiry()
+    markets_args = [
+        market_args(expiry, strike_price, is_put)
+        for strike_price in STRIKE_PRICES
+        for is_put in [False, True]
+    ]
+
+    # brownie doesn't let us use OptionsFactory.at
+    factory = Contract.from_explorer(FACTORY[NETWORK])
+    markets = create_markets(deployer, factory, markets_args)
+    # for market in markets:
+    #     deploy_seed_rewards(deployer, market)
 
     print(f"Gas used in deployment: {(balance - deployer.balance()) / 1e18:.4f} ETH")
     print()
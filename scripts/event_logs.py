@@ -0,0 +1,130 @@
+"""
+Helpers for fetching and decoding contract event logs
+
+`get_logs` scans a block range in chunks. The chunk size is halved whenever
+the node rejects a request, e.g. because the range has too many logs, and is
+doubled again while chunks come back small. Chunks are yielded one by one so
+callers can checkpoint their progress
+
+`get_logs_since` does the same for addresses that have each been scanned up
+to a different block
+
+"""
+
+import requests
+from brownie import web3
+from eth_abi import decode_abi, decode_single
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+
+
+INITIAL_CHUNK_SIZE = 2000
+MAX_CHUNK_SIZE = 100000
+TARGET_LOGS_PER_CHUNK = 5000
+
+
+def get_event_abis(abi, names):
+    """
+    Map topic of each event in `names` to its abi
+    """
+    events = {}
+    for item in abi:
+        if item.get("type") == "event" and item["name"] in names:
+            events["0x" + event_abi_to_log_topic(item).hex()] = item
+    return events
+
+
+def decode_value(type_, data):
+    value = decode_single(type_, data)
+    return to_checksum_address(value) if type_ == "address" else value
+
+
+def decode_log(log, events):
+    """
+    Decode a raw log from `eth_getLogs` using the event abis from `get_event_abis`
+    """
+    topics = [t if isinstance(t, str) else t.hex() for t in log["topics"]]
+    topics = ["0x" + t[2:] if t.startswith("0x") else "0x" + t for t in topics]
+    event = events[topics[0]]
+
+    indexed = [x for x in event["inputs"] if x["indexed"]]
+    not_indexed = [x for x in event["inputs"] if not x["indexed"]]
+
+    data = log["data"]
+    data = bytes.fromhex(data[2:]) if isinstance(data, str) else bytes(data)
+    values = decode_abi([x["type"] for x in not_indexed], data)
+
+    args = {}
+    for x, topic in zip(indexed, topics[1:]):
+        args[x["name"]] = decode_value(x["type"], bytes.fromhex(topic[2:]))
+    for x, value in zip(not_indexed, values):
+        args[x["name"]] = (
+            to_checksum_address(value) if x["type"] == "address" else value
+        )
+
+    tx_hash = log["transactionHash"]
+    return {
+        "event": event["name"],
+        "address": to_checksum_address(log["address"]),
+        "blockNumber": log["blockNumber"],
+        "logIndex": log["logIndex"],
+        "transactionHash": tx_hash if isinstance(tx_hash, str) else tx_hash.hex(),
+        "args": args,
+    }
+
+
+def get_logs(addresses, events, from_block, to_block, chunk_size=INITIAL_CHUNK_SIZE):
+    """
+    Yield `(end_block, logs)` for consecutive chunks covering `from_block` to
+    `to_block` inclusive, where `logs` are the decoded logs emitted by
+    `addresses` for any event in `events`, in the order they were emitted
+    """
+    addresses = [str(a) for a in addresses]
+    topics = [list(events)]
+
+    start = from_block
+    while start <= to_block:
+        end = min(start + chunk_size - 1, to_block)
+        try:
+            logs = web3.eth.getLogs(
+                {
+                    "address": addresses,
+                    "topics": topics,
+                    "fromBlock": start,
+                    "toBlock": end,
+                }
+            )
+        except (ValueError, requests.exceptions.RequestException):
+            if chunk_size == 1:
+                raise
+            chunk_size = max(chunk_size // 2, 1)
+            continue
+
+        logs = sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        yield end, [decode_log(log, events) for log in logs]
+
+        if len(logs) < TARGET_LOGS_PER_CHUNK // 2:
+            chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
+        start = end + 1
+
+
+def get_logs_since(checkpoints, events, to_block):
+    """
+    Yield `(addresses, end_block, logs)` for chunks covering each address from
+    the block after its checkpoint up to `to_block`. `checkpoints` maps each
+    address to the last block already scanned and is updated after each chunk
+    has been processed
+
+    Addresses with the same checkpoint are scanned together. When they catch up
+    with the next checkpoint, those addresses join them
+    """
+    while True:
+        pending = sorted(set(b for b in checkpoints.values() if b < to_block))
+        if not pending:
+            break
+        group = [a for a, b in checkpoints.items() if b == pending[0]]
+        end = pending[1] if len(pending) > 1 else to_block
+
+        for chunk_end, logs in get_logs(group, events, pending[0] + 1, end):
+            yield group, chunk_end, logs
+            for a in group:
+                checkpoints[a] = chunk_end
@@ -1,34 +1,39 @@
+"""
+Flattens contracts and everything they import into single files, e.g. for
+verifying them on Etherscan
+
+Imports are followed from each target contract, with `@openzeppelin` and any
+other remappings in `brownie-config.yaml` resolved to the installed brownie
+packages. Files are ordered so each one comes after everything it imports and
+files imported more than once are only included once. Sources are read and
+parsed once and shared between all targets. Imports that use aliases or that
+can't be parsed raise an error instead of being left out of the output
+
+Usage:
+>> python -m scripts.flatten
+>> python -m scripts.flatten contracts/OptionsFactory.sol
+
+Without arguments every contract in `TARGETS` is flattened into `OUTPUT_PATH`.
+A single target is printed instead
+
+"""
+
+import glob
 import os
+import re
 
+import yaml
 
-PATHS = [
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/GSN/Context.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/access/Ownable.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/math/SafeMath.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/math/Math.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/token/ERC20/IERC20.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/token/ERC20/ERC20.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/token/ERC20/SafeERC20.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/utils/Address.sol",
-    "~/.brownie/packages/OpenZeppelin/openzeppelin-contracts@3.2.0/contracts/utils/ReentrancyGuard.sol",
-    "contracts/libraries/openzeppelin/Initializable.sol",
-    "contracts/libraries/openzeppelin/ContextUpgradeSafe.sol",
-    "contracts/libraries/openzeppelin/OwnableUpgradeSafe.sol",
-    "contracts/libraries/openzeppelin/ReentrancyGuardUpgradeSafe.sol",
-    "contracts/libraries/openzeppelin/ERC20UpgradeSafe.sol",
-    "interfaces/AggregatorV3Interface.sol",
-    "interfaces/IOracle.sol",
-    "contracts/libraries/ABDKMath64x64.sol",
-    "contracts/libraries/CloneFactory.sol",
-    "contracts/libraries/UniERC20.sol",
-    "contracts/ChainlinkOracle.sol",
-    "contracts/OptionsToken.sol",
-    "contracts/OptionsMarketMaker.sol",
-    "contracts/OptionsFactory.sol",
-    # "contracts/mocks/MockToken.sol",
-    # "contracts/CharmToken.sol",
-    # "interfaces/IUniswapV2Pair.sol",
-    # "contracts/UniswapOracle.sol",
+
+CONFIG_PATH = "brownie-config.yaml"
+PACKAGES_PATH = "~/.brownie/packages"
+OUTPUT_PATH = "build/flattened/{name}.sol"
+
+# contracts that are deployed on their own. libraries, interfaces and mocks
+# are only included when imported
+TARGETS = [
+    "contracts/*.sol",
+    "contracts/rewards/*.sol",
 ]
 
 PREFIX = """
@@ -40,21 +45,140 @@ pragma solidity ^0.6.12;
 
 IGNORE = [
     "// SPDX-License-Identifier:",
-    "import ",
     "pragma ",
 ]
 
+# forms of import statement after whitespace has been collapsed. each one is
+# flattened by including the whole imported file, which can't keep aliases so
+# aliased imports are rejected
+IMPORT_RES = [
+    re.compile(r'^import (?P<q>["\'])(?P<path>.+?)(?P=q)(?P<alias> as \w+)? ?;$'),
+    re.compile(
+        r'^import \*(?P<alias> as \w+) from (?P<q>["\'])(?P<path>.+?)(?P=q) ?;$'
+    ),
+    re.compile(
+        r'^import ?\{(?P<symbols>[^}]*)\} ?from (?P<q>["\'])(?P<path>.+?)(?P=q) ?;$'
+    ),
+]
+
+
+def load_remappings(config_path=CONFIG_PATH):
+    """
+    Map each remapped prefix to the path of the package it points to
+    """
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+
+    remappings = {}
+    solc = config.get("compiler", {}).get("solc", {})
+    for remapping in solc.get("remappings", []):
+        prefix, package = remapping.split("=", 1)
+        remappings[prefix] = os.path.join(os.path.expanduser(PACKAGES_PATH), package)
+    return remappings
+
 
-def main():
-    lines = []
-    for path in PATHS:
-        path = os.path.expanduser(path)
-        with open(path, "r") as f:
-            for line in f:
-                if all(not line.strip().startswith(s) for s in IGNORE):
-                    lines.append(line)
-    print(PREFIX + "".join(lines))
+class SourceCache:
+    def __init__(self, remappings):
+        self.remappings = remappings
+
+        # path -> (lines without imports and pragmas, paths of imported files)
+        self.sources = {}
+
+    def resolve(self, path, importer):
+        for prefix, target in self.remappings.items():
+            if path.startswith(prefix + "/"):
+                return os.path.normpath(os.path.join(target, path[len(prefix) + 1 :]))
+        if path.startswith("."):
+            path = os.path.join(os.path.dirname(importer), path)
+        return os.path.normpath(path)
+
+    def parse_import(self, statement, path):
+        """
+        Path of the file imported by `statement`, which is in file `path`
+        """
+        statement = " ".join(statement[: statement.index(";") + 1].split())
+        for regex in IMPORT_RES:
+            match = regex.match(statement)
+            if match:
+                break
+        else:
+            raise ValueError(f"{path}: can't parse '{statement}'")
+
+        groups = match.groupdict()
+        if groups.get("alias") or " as " in f" {groups.get('symbols', '')} ":
+            raise ValueError(f"{path}: can't flatten aliased import '{statement}'")
+        return self.resolve(match.group("path"), path)
+
+    def parse(self, path):
+        if path not in self.sources:
+            lines, imports = [], []
+            statement = None
+            with open(path) as f:
+                for line in f:
+                    # import statements can span several lines
+                    if statement is None and re.match(r"\s*import\b", line):
+                        statement = ""
+                    if statement is not None:
+                        statement += line
+                        if ";" in line:
+                            imports.append(self.parse_import(statement, path))
+                            statement = None
+                    elif all(not line.strip().startswith(s) for s in IGNORE):
+                        lines.append(line)
+            if statement is not None:
+                raise ValueError(f"{path}: unterminated '{statement.strip()}'")
+            self.sources[path] = (lines, imports)
+        return self.sources[path]
+
+    def sort(self, path):
+        """
+        Paths of `path` and every file it imports, directly or not, with each
+        file after the files it imports
+        """
+        order, visited, visiting = [], set(), set()
+
+        def visit(p):
+            if p in visited:
+                return
+            if p in visiting:
+                raise ValueError(f"Circular import of {p}")
+            visiting.add(p)
+            for imported in self.parse(p)[1]:
+                visit(imported)
+            visiting.remove(p)
+            visited.add(p)
+            order.append(p)
+
+        visit(os.path.normpath(path))
+        return order
+
+    def flatten(self, path):
+        lines = []
+        for p in self.sort(path):
+            lines.extend(self.parse(p)[0])
+        return PREFIX + "".join(lines)
+
+
+def main(*targets):
+    cache = SourceCache(load_remappings())
+
+    if len(targets) == 1:
+        print(cache.flatten(targets[0]))
+        return
+
+    if not targets:
+        targets = sorted(p for pattern in TARGETS for p in glob.glob(pattern))
+    for target in targets:
+        name = os.path.splitext(os.path.basename(target))[0]
+        path = OUTPUT_PATH.format(name=name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(cache.flatten(target))
+        print(f"Flattened {target} into {path}")
+    print(f"Parsed {len(cache.sources)} files")
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+
+    main(*sys.argv[1:])
@@ -1,13 +1,32 @@
 import datetime
 import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from brownie import (
     accounts,
+    network,
+    web3,
     Contract,
     OptionsMarketMaker,
     OptionsToken,
 )
 
+from scripts.rpc_batch import batch_call
+
+
+# in concurrent mode, number of markets fetched in parallel and how many times
+# a failed call is retried with exponential backoff
+MAX_WORKERS = 16
+MAX_RETRIES = 5
+RETRY_DELAY = 0.5
+
+# fields that can't change are cached here so later runs only fetch them for
+# new markets
+CACHE_PATH = "build/options/{network}.json"
+
 
 TOKEN_SYMBOLS = {
     "0x0000000000000000000000000000000000000000": "ETH",
@@ -15,33 +34,198 @@ TOKEN_SYMBOLS = {
     "0xED6bfBd086ad6AdaB4A709071f9ae3863796F74A": "MOCK",  # ropsten
 }
 
+# set in `OptionsMarketMaker.initialize` and never changed
+IMMUTABLE_FIELDS = [
+    "baseToken",
+    "longToken",
+    "shortToken",
+    "isPutMarket",
+    "alpha",
+    "strikePrice",
+]
 
-def main():
-    options = []
-    for market in OptionsMarketMaker:
-        baseAddress = str(market.baseToken())
-        baseSymbol = TOKEN_SYMBOLS.get(baseAddress, "?")
-
-        addresses = [market.longToken(), market.shortToken()]
-        for i in range(2):
-            address = addresses[i]
-            option = OptionsToken.at(address)
-            symbol = option.symbol()
-            options.append(
-                {
-                    "address": address,
-                    "symbol": symbol,
-                    "oppositeAddress": addresses[1 - i],
-                    "marketAddress": market.address,
-                    "oracle": market.oracle(),
-                    "isPutMarket": market.isPutMarket(),
-                    "alpha": market.alpha(),
-                    "expiryTime": market.expiryTime(),
-                    "strikePrice": market.strikePrice(),
-                    "baseAddress": baseAddress,
-                    "baseSymbol": baseSymbol,
-                    "isLong": i == 0,
-                }
+# can be changed by the owner with `setOracle` and `setExpiryTime`
+MUTABLE_FIELDS = [
+    "oracle",
+    "expiryTime",
+]
+
+
+def fetch_fields(markets, names, block):
+    calls = [
+        (market.address, OptionsMarketMaker.abi, name, ())
+        for market in markets
+        for name in names
+    ]
+    results = batch_call(calls, block)
+
+    n = len(names)
+    return [dict(zip(names, results[i : i + n])) for i in range(0, len(results), n)]
+
+
+def fetch_symbols(addresses, block):
+    return batch_call(((a, OptionsToken.abi, "symbol", ()) for a in addresses), block)
+
+
+def retry(f, *args, **kwargs):
+    for i in range(MAX_RETRIES):
+        try:
+            return f(*args, **kwargs)
+        except Exception:
+            if i == MAX_RETRIES - 1:
+                raise
+            time.sleep(RETRY_DELAY * 2 ** i)
+
+
+def fetch_market(address, cached, block):
+    """
+    Fetch fields of a single market with one call per field. Immutable fields
+    are only fetched if `cached` is None
+
+    Runs on worker threads so uses plain web3 contracts, since brownie's
+    contract objects aren't thread-safe
+    """
+
+    def call(address, abi, name):
+        contract = web3.eth.contract(address, abi=abi)
+        f = getattr(contract.functions, name)()
+        return retry(f.call, block_identifier=block)
+
+    fields = cached
+    if fields is None:
+        fields = {
+            name: call(address, OptionsMarketMaker.abi, name)
+            for name in IMMUTABLE_FIELDS
+        }
+        for k in ["longToken", "shortToken"]:
+            symbol = call(fields[k], OptionsToken.abi, "symbol")
+            fields[k.replace("Token", "Symbol")] = symbol
+        fields["block"] = block
+
+    mutable_fields = {
+        name: call(address, OptionsMarketMaker.abi, name) for name in MUTABLE_FIELDS
+    }
+    return fields, mutable_fields
+
+
+def fetch_markets_concurrently(markets, cache, block):
+    """
+    Fetch markets using up to `MAX_WORKERS` threads and yield them in the same
+    order as `markets`, each one as soon as it and all markets before it have
+    completed. Newly fetched immutable fields are added to `cache`
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(
+                fetch_market,
+                market.address,
+                cache["markets"].get(market.address),
+                block,
             )
+            for market in markets
+        ]
+        for market, future in zip(markets, futures):
+            fields, mutable_fields = future.result()
+            cache["markets"][market.address] = fields
+            yield market, {**fields, **mutable_fields}
+    cache["block"] = block
+
+
+def fetch_markets_batched(markets, cache, block):
+    update_cache(cache, markets, block)
+    mutable_fields = fetch_fields(markets, MUTABLE_FIELDS, block)
+    for market, fields in zip(markets, mutable_fields):
+        yield market, {**cache["markets"][market.address], **fields}
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {"block": 0, "markets": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def update_cache(cache, markets, block):
+    new_markets = [m for m in markets if m.address not in cache["markets"]]
+    new_fields = fetch_fields(new_markets, IMMUTABLE_FIELDS, block)
+
+    tokens = [f[k] for f in new_fields for k in ["longToken", "shortToken"]]
+    symbols = fetch_symbols(tokens, block)
+
+    for i, (market, fields) in enumerate(zip(new_markets, new_fields)):
+        fields["longSymbol"] = symbols[2 * i]
+        fields["shortSymbol"] = symbols[2 * i + 1]
+        fields["block"] = block
+        cache["markets"][market.address] = fields
+    cache["block"] = block
+
+
+def format_options(market_address, fields):
+    baseAddress = str(fields["baseToken"])
+    baseSymbol = TOKEN_SYMBOLS.get(baseAddress, "?")
+
+    options = []
+    addresses = [fields["longToken"], fields["shortToken"]]
+    symbols = [fields["longSymbol"], fields["shortSymbol"]]
+    for i in range(2):
+        options.append(
+            {
+                "address": addresses[i],
+                "symbol": symbols[i],
+                "oppositeAddress": addresses[1 - i],
+                "marketAddress": market_address,
+                "oracle": fields["oracle"],
+                "isPutMarket": fields["isPutMarket"],
+                "alpha": fields["alpha"],
+                "expiryTime": fields["expiryTime"],
+                "strikePrice": fields["strikePrice"],
+                "baseAddress": baseAddress,
+                "baseSymbol": baseSymbol,
+                "isLong": i == 0,
+            }
+        )
+    return options
+
+
+def main(mode="batch"):
+    """
+    Print all options as a json list. In batch mode all market data is fetched
+    with a few JSON-RPC batch requests. In concurrent mode markets are fetched
+    in parallel with one request per field, e.g. for nodes that don't support
+    batch requests
+
+    >> brownie run generate_options --network mainnet
+    >> brownie run generate_options main concurrent --network mainnet
+    """
+    fetches = {
+        "batch": fetch_markets_batched,
+        "concurrent": fetch_markets_concurrently,
+    }
+    if mode not in fetches:
+        raise ValueError(f"Unknown mode {mode}. Should be one of {list(fetches)}")
+
+    path = CACHE_PATH.format(network=network.show_active())
+    cache = load_cache(path)
+    block = web3.eth.blockNumber
+    markets = list(OptionsMarketMaker)
 
-    print(json.dumps(options, indent=4, sort_keys=True))
+    # print each option as soon as its market has been fetched while still
+    # outputting a valid json list. if fetching fails partway, the list is
+    # still closed and fields fetched so far are still cached before raising
+    sep = "[\n"
+    try:
+        for market, fields in fetches[mode](markets, cache, block):
+            for option in format_options(market.address, fields):
+                sys.stdout.write(sep + json.dumps(option, indent=4, sort_keys=True))
+                sep = ",\n"
+            sys.stdout.flush()
+    finally:
+        print("[]" if sep == "[\n" else "\n]")
+        save_cache(path, cache)
@@ -0,0 +1,257 @@
+"""
+Calculates the Black-Scholes implied volatility of every market from the
+marginal prices of its LS-LMSR cost function
+
+A long and a short token together always pay out one unit of base tokens, so
+the long token's share of the two marginal prices is the premium of one
+option in base tokens. LS-LMSR prices sum to more than 1 because of the
+liquidity-sensitive spread, so they're normalized to sum to 1 first. For call
+markets the base token is the underlying, so the premium is multiplied by the
+spot price, and for put markets it's the quote token and one option costs
+`strikePrice` base tokens, so it's multiplied by the strike price. Each
+premium is then inverted with Black-Scholes with zero interest rate, solving
+all markets at once with `newton.solve_bracketed`
+
+Markets are read from the catalogue cached by `generate_options`, so run that
+first. Spot prices are read from each market's oracle, except that the spot
+price of UniswapOracle is used instead of its TWAP. Markets that have
+expired, have no supply, whose oracle reverts or whose premium is outside the
+no-arbitrage bounds get `nan`
+
+Usage:
+>> brownie run implied_vol --network mainnet
+>> brownie run implied_vol main <from_block> <to_block> --network mainnet
+
+"""
+
+import json
+import math
+import sys
+
+import numpy as np
+from brownie import (
+    interface,
+    network,
+    web3,
+    OptionsMarketMaker,
+    OptionsToken,
+    UniswapOracle,
+)
+
+from scripts.calc_lslmsr_prices import batch_prices
+from scripts.generate_options import CACHE_PATH, load_cache
+from scripts.newton import solve_bracketed
+from scripts.rpc_batch import BatchCallError, batch_call, get_block_timestamps
+
+
+SCALE = 10 ** 18
+SECONDS_PER_YEAR = 365 * 24 * 60 * 60
+
+MIN_VOL = 1e-4
+MAX_VOL = 20.0
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-10
+
+UNISWAP = "uniswap"
+DEFAULT = "default"
+
+# `UniswapOracle.getPrice` returns a TWAP that isn't scaled by 10^18 so use its
+# spot price instead. other oracles return prices scaled by 10^18
+SPOT_CALLS = {
+    UNISWAP: (UniswapOracle.abi, "fetchSpotAndCumulativePrice"),
+    DEFAULT: (interface.IOracle.abi, "getPrice"),
+}
+
+_erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def norm_cdf(x):
+    x = np.asarray(x, dtype=np.float64)
+    return 0.5 * _erfc(-x / math.sqrt(2)).astype(np.float64)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / math.sqrt(2 * math.pi)
+
+
+def calc_bs_price(spot, strike, t, vol, is_put):
+    """
+    Black-Scholes price of calls or puts with zero interest rate. Returns the
+    price and its derivative with respect to `vol`
+    """
+    sd = vol * np.sqrt(t)
+    d1 = (np.log(spot / strike) + 0.5 * sd * sd) / sd
+    d2 = d1 - sd
+    call = spot * norm_cdf(d1) - strike * norm_cdf(d2)
+    put = strike * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    price = np.where(is_put, put, call)
+    vega = spot * norm_pdf(d1) * np.sqrt(t)
+    return price, vega
+
+
+def solve_implied_vol(premiums, spot, strike, t, is_put):
+    """
+    Volatility at which the Black-Scholes price equals `premiums`. All
+    arguments are broadcast against each other
+    """
+    premiums, spot, strike, t, is_put = np.broadcast_arrays(
+        *[np.asarray(x, dtype=np.float64) for x in [premiums, spot, strike, t]],
+        np.asarray(is_put, dtype=bool),
+    )
+
+    # price is increasing in vol from the intrinsic value to the spot price for
+    # calls or strike price for puts
+    intrinsic = np.maximum(np.where(is_put, strike - spot, spot - strike), 0.0)
+    upper = np.where(is_put, strike, spot)
+    valid = (t > 0) & (premiums > intrinsic) & (premiums < upper)
+
+    # solve invalid markets too but with dummy values so they don't cause
+    # warnings and replace them with nan at the end
+    t = np.where(valid, t, 1.0)
+    premiums = np.where(valid, premiums, upper / 2)
+
+    def f(vol):
+        price, vega = calc_bs_price(spot, strike, t, vol, is_put)
+        return price - premiums, vega
+
+    lo = np.full(premiums.shape, MIN_VOL)
+    hi = np.full(premiums.shape, MAX_VOL)
+    vol = np.full(premiums.shape, 0.5)
+    vol = solve_bracketed(f, lo, hi, vol, TOLERANCE, MAX_ITERATIONS)
+
+    # premiums that need more than `MAX_VOL` have no sensible answer
+    return np.where(valid & (vol < MAX_VOL), vol, np.nan)
+
+
+def calc_premiums(long_supply, short_supply, alpha, is_put, strike_price, spot):
+    """
+    Premium of one option in units of the quote token implied by the normalized
+    LS-LMSR prices. Supplies, alpha and prices are in wei
+    """
+    q = np.stack([long_supply, short_supply], axis=-1).astype(np.float64) / SCALE
+    alpha = np.asarray(alpha, dtype=np.float64) / SCALE
+    p = batch_prices(q, alpha)
+    fraction = p[..., 0] / p.sum(axis=-1)
+
+    unit = np.where(is_put, strike_price, spot).astype(np.float64) / SCALE
+    return fraction * unit
+
+
+def load_markets(path=None):
+    """
+    Markets cached by `generate_options` as a list of (address, fields)
+    """
+    cache = load_cache(path or CACHE_PATH.format(network=network.show_active()))
+    return sorted(cache["markets"].items())
+
+
+def fetch_oracle_types(oracles, oracle_types):
+    """
+    Add whether each of `oracles` is a UniswapOracle to `oracle_types`. Only
+    UniswapOracle has `pair`, so it reverts on other oracles
+    """
+    new_oracles = sorted(set(oracles) - set(oracle_types))
+    pairs = batch_call(
+        ((o, UniswapOracle.abi, "pair", ()) for o in new_oracles),
+        allow_failure=True,
+    )
+    for oracle, pair in zip(new_oracles, pairs):
+        oracle_types[oracle] = UNISWAP if isinstance(pair, str) else DEFAULT
+
+
+def fetch_states(markets, block, oracle_types):
+    """
+    Supplies, expiry time and spot price of each market at `block`. Spot
+    prices are nan for markets whose oracle reverted, and the errors are
+    returned too. `oracle_types` caches the type of each oracle
+    """
+    names = ["expiryTime", "oracle"]
+    calls = [
+        (address, OptionsMarketMaker.abi, name, ())
+        for address, _ in markets
+        for name in names
+    ]
+    results = batch_call(calls, block)
+    expiry_times, oracles = results[::2], results[1::2]
+    fetch_oracle_types(oracles, oracle_types)
+
+    calls = [
+        (fields[k], OptionsToken.abi, "totalSupply", ())
+        for _, fields in markets
+        for k in ["longToken", "shortToken"]
+    ]
+    results = batch_call(calls, block)
+
+    # markets often share an oracle so only fetch each one once
+    unique_oracles = sorted(set(oracles))
+    prices = batch_call(
+        ((o, *SPOT_CALLS[oracle_types[o]], ()) for o in unique_oracles),
+        block,
+        allow_failure=True,
+    )
+
+    spots, errors = {}, {}
+    for oracle, price in zip(unique_oracles, prices):
+        if isinstance(price, BatchCallError):
+            errors[oracle] = price
+            spots[oracle] = np.nan
+        else:
+            # `fetchSpotAndCumulativePrice` also returns the cumulative price
+            spots[oracle] = price[0] if isinstance(price, tuple) else price
+
+    return {
+        "longSupply": results[::2],
+        "shortSupply": results[1::2],
+        "expiryTime": expiry_times,
+        "spot": [spots[o] for o in oracles],
+        "errors": errors,
+    }
+
+
+def calc_surface(markets, states, timestamp):
+    """
+    Implied volatility of each market given its state at `timestamp`
+    """
+    is_put = np.array([fields["isPutMarket"] for _, fields in markets], dtype=bool)
+    alpha = np.array([float(fields["alpha"]) for _, fields in markets])
+    strike = np.array([float(fields["strikePrice"]) for _, fields in markets])
+    spot = np.array(states["spot"], dtype=np.float64)
+    t = (
+        np.array(states["expiryTime"], dtype=np.float64) - timestamp
+    ) / SECONDS_PER_YEAR
+
+    long_supply = np.array(states["longSupply"], dtype=np.float64)
+    short_supply = np.array(states["shortSupply"], dtype=np.float64)
+    premiums = calc_premiums(long_supply, short_supply, alpha, is_put, strike, spot)
+    vols = solve_implied_vol(premiums, spot / SCALE, strike / SCALE, t, is_put)
+
+    # prices of markets nobody has traded in don't depend on anything
+    return np.where(long_supply + short_supply > 0, vols, np.nan)
+
+
+def main(from_block=None, to_block=None):
+    markets = load_markets()
+    oracle_types = {}
+    latest = web3.eth.blockNumber
+    from_block = int(from_block or latest)
+    to_block = int(to_block or from_block)
+
+    blocks = list(range(from_block, to_block + 1))
+    timestamps = get_block_timestamps(blocks)
+    for block in blocks:
+        states = fetch_states(markets, block, oracle_types)
+        for oracle, error in states["errors"].items():
+            print(f"Block {block}: oracle {oracle} failed: {error}", file=sys.stderr)
+        vols = calc_surface(markets, states, timestamps[block])
+        surface = {
+            address: {
+                "expiryTime": expiry_time,
+                "isPutMarket": fields["isPutMarket"],
+                "strikePrice": str(fields["strikePrice"]),
+                "impliedVol": None if np.isnan(vol) else float(vol),
+            }
+            for (address, fields), expiry_time, vol in zip(
+                markets, states["expiryTime"], vols
+            )
+        }
+        print(json.dumps({"block": block, "markets": surface}, sort_keys=True))
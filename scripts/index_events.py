@@ -0,0 +1,160 @@
+"""
+Indexes `Trade`, `Settled` and `Redeemed` events of every OptionsMarketMaker
+into a local SQLite database
+
+Each market has a checkpoint with the last block indexed, so later runs only
+scan new blocks. Markets seen for the first time are indexed from
+`START_BLOCK`. Only blocks with at least `CONFIRMATIONS` confirmations are
+indexed so rows don't have to be removed after a reorg
+
+uint256 values are stored in columns with declared type U256 TEXT as zero-padded
+decimal strings so they keep their order in SQL queries. Open the database with
+`connect` to read them back as python ints
+
+Usage:
+>> brownie run index_events --network mainnet
+
+"""
+
+import os
+import sqlite3
+
+from brownie import network, web3, OptionsMarketMaker
+
+from scripts.event_logs import get_event_abis, get_logs_since
+
+
+DB_PATH = "build/events/{network}.sqlite"
+START_BLOCK = 0
+CONFIRMATIONS = 12
+
+EVENTS = ["Trade", "Settled", "Redeemed"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    market TEXT NOT NULL,
+    account TEXT NOT NULL,
+    is_buy INTEGER NOT NULL,
+    long_shares U256 TEXT NOT NULL,
+    short_shares U256 TEXT NOT NULL,
+    cost U256 TEXT NOT NULL,
+    new_long_supply U256 TEXT NOT NULL,
+    new_short_supply U256 TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS trades_market ON trades (market, block);
+
+CREATE TABLE IF NOT EXISTS settlements (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    market TEXT NOT NULL,
+    settlement_price U256 TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+
+CREATE TABLE IF NOT EXISTS redemptions (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    market TEXT NOT NULL,
+    account TEXT NOT NULL,
+    long_shares_in U256 TEXT NOT NULL,
+    short_shares_in U256 TEXT NOT NULL,
+    amount_out U256 TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS redemptions_market ON redemptions (market, block);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    market TEXT PRIMARY KEY,
+    block INTEGER NOT NULL
+);
+"""
+
+
+sqlite3.register_converter("U256", lambda b: int(b))
+
+
+def uint256(x):
+    return format(x, "078d")
+
+
+def connect(path):
+    db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES)
+    db.executescript(SCHEMA)
+    return db
+
+
+def insert_log(db, log):
+    args = log["args"]
+    key = (log["blockNumber"], log["logIndex"], log["transactionHash"], log["address"])
+    if log["event"] == "Trade":
+        db.execute(
+            "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            key
+            + (
+                args["account"],
+                int(args["isBuy"]),
+                uint256(args["longShares"]),
+                uint256(args["shortShares"]),
+                uint256(args["cost"]),
+                uint256(args["newLongSupply"]),
+                uint256(args["newShortSupply"]),
+            ),
+        )
+    elif log["event"] == "Settled":
+        db.execute(
+            "INSERT OR IGNORE INTO settlements VALUES (?, ?, ?, ?, ?)",
+            key + (uint256(args["settlementPrice"]),),
+        )
+    elif log["event"] == "Redeemed":
+        db.execute(
+            "INSERT OR IGNORE INTO redemptions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            key
+            + (
+                args["account"],
+                uint256(args["longSharesIn"]),
+                uint256(args["shortSharesIn"]),
+                uint256(args["amountOut"]),
+            ),
+        )
+
+
+def get_checkpoints(db, markets):
+    checkpoints = dict(db.execute("SELECT market, block FROM checkpoints"))
+    return {m: checkpoints.get(m, START_BLOCK - 1) for m in markets}
+
+
+def index_markets(db, markets, to_block):
+    """
+    Index events of `markets` from their checkpoints up to `to_block`
+    """
+    events = get_event_abis(OptionsMarketMaker.abi, EVENTS)
+    checkpoints = get_checkpoints(db, [str(m) for m in markets])
+
+    for group, chunk_end, logs in get_logs_since(checkpoints, events, to_block):
+        with db:
+            for log in logs:
+                insert_log(db, log)
+            db.executemany(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?)",
+                [(m, chunk_end) for m in group],
+            )
+
+
+def main():
+    path = DB_PATH.format(network=network.show_active())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = connect(path)
+
+    to_block = web3.eth.blockNumber - CONFIRMATIONS
+    index_markets(db, [m.address for m in OptionsMarketMaker], to_block)
+
+    for table in ["trades", "settlements", "redemptions"]:
+        (count,) = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+        print(f"{table}: {count}")
+    db.close()
@@ -0,0 +1,158 @@
+"""
+Indexes the balance of every holder of every OptionsToken from `Transfer`
+events
+
+Transfers are folded into an in-memory map of token -> holder -> balance.
+Mints are transfers from the zero address and burns are transfers to it, so
+they only change the balance of the other side. Holders whose balance drops to
+0 are removed
+
+The map and the last block indexed for each token are saved to a gzipped json
+snapshot with balances as hex strings, every `SAVE_INTERVAL` seconds and when
+done. Later runs load the snapshot and only scan new blocks. Tokens are read
+from the cache written by `generate_options`
+
+Run with a market address to print its holders' long and short balances in
+the format read by `calc_payouts`
+
+Usage:
+>> brownie run generate_options --network mainnet
+>> brownie run index_holders --network mainnet
+>> brownie run index_holders main <market> --network mainnet
+
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+from brownie import network, web3, OptionsToken
+
+from scripts.event_logs import get_event_abis, get_logs_since
+from scripts.generate_options import CACHE_PATH
+from scripts.index_events import CONFIRMATIONS, START_BLOCK
+
+
+SNAPSHOT_PATH = "build/holders/{network}.json.gz"
+SAVE_INTERVAL = 60
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class HolderIndex:
+    def __init__(self, balances=None, checkpoints=None):
+        self.balances = balances or {}
+        self.checkpoints = checkpoints or {}
+
+    def add_tokens(self, tokens):
+        for token in tokens:
+            self.checkpoints.setdefault(token, START_BLOCK - 1)
+            self.balances.setdefault(token, {})
+
+    def apply(self, log):
+        balances = self.balances[log["address"]]
+        sender, recipient, value = (
+            log["args"]["from"],
+            log["args"]["to"],
+            log["args"]["value"],
+        )
+
+        # zero-value transfers are valid but don't change any balance
+        if value == 0:
+            return
+
+        if sender != ZERO_ADDRESS:
+            balance = balances.get(sender, 0) - value
+            if balance < 0:
+                raise ValueError(f"Negative balance for {sender} in {log}")
+            if balance == 0:
+                del balances[sender]
+            else:
+                balances[sender] = balance
+
+        if recipient != ZERO_ADDRESS:
+            balances[recipient] = balances.get(recipient, 0) + value
+
+    def update(self, to_block, path=None):
+        """
+        Apply transfers of all tokens from their checkpoints up to `to_block`.
+        If `path` is given, the snapshot is saved there periodically
+        """
+        events = get_event_abis(OptionsToken.abi, ["Transfer"])
+        last_save = time.time()
+
+        # `get_logs_since` updates its checkpoints when the next chunk is
+        # requested so use a copy and update ours before saving
+        checkpoints = dict(self.checkpoints)
+        for group, chunk_end, logs in get_logs_since(checkpoints, events, to_block):
+            for log in logs:
+                self.apply(log)
+            for token in group:
+                self.checkpoints[token] = chunk_end
+
+            if path is not None and time.time() - last_save > SAVE_INTERVAL:
+                self.save(path)
+                last_save = time.time()
+
+    def total_supply(self, token):
+        return sum(self.balances[token].values())
+
+    def save(self, path):
+        data = {
+            "checkpoints": self.checkpoints,
+            "balances": {
+                token: {holder: hex(b) for holder, b in balances.items()}
+                for token, balances in self.balances.items()
+            },
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path + ".tmp", "wt") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+        balances = {
+            token: {holder: int(b, 16) for holder, b in balances.items()}
+            for token, balances in data["balances"].items()
+        }
+        return cls(balances, data["checkpoints"])
+
+
+def market_balances(index, long_token, short_token):
+    """
+    Map each holder of a market's options to `[long balance, short balance]`
+    """
+    longs, shorts = index.balances[long_token], index.balances[short_token]
+    return {h: [longs.get(h, 0), shorts.get(h, 0)] for h in set(longs) | set(shorts)}
+
+
+def main(market=None):
+    with open(CACHE_PATH.format(network=network.show_active()), "r") as f:
+        markets = json.load(f)["markets"]
+
+    path = SNAPSHOT_PATH.format(network=network.show_active())
+    index = HolderIndex.load(path) if os.path.exists(path) else HolderIndex()
+    index.add_tokens(
+        fields[k] for fields in markets.values() for k in ["longToken", "shortToken"]
+    )
+
+    to_block = web3.eth.blockNumber - CONFIRMATIONS
+    index.update(to_block, path)
+    index.save(path)
+
+    holders = sum(len(b) for b in index.balances.values())
+    print(
+        f"{len(index.balances)} tokens, {holders} balances up to block {to_block}",
+        file=sys.stderr,
+    )
+
+    if market is not None:
+        fields = markets[market]
+        balances = market_balances(index, fields["longToken"], fields["shortToken"])
+        balances = {h: [str(x) for x in b] for h, b in sorted(balances.items())}
+        print(json.dumps(balances, indent=4))
@@ -0,0 +1,121 @@
+"""
+Helpers shared by keeper scripts that send transactions at scheduled times
+
+Calls to the node are blocking, so they're run in a thread pool and awaited
+from asyncio. Brownie's contract and account objects aren't thread-safe, so
+workers only use plain web3 contracts from `contract` and transactions are
+built and signed locally from the account's private key. `NonceManager` hands
+out nonces locally so many transactions from the same account can be sent
+without waiting for earlier ones to be mined, and `ChainClock` estimates the
+current block timestamp without polling the node every time it's needed
+
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from brownie import web3
+
+
+# number of threads for blocking calls, e.g. waiting for transactions to be mined
+MAX_WORKERS = 64
+
+# how often the clock checks the latest block
+POLL_INTERVAL = 5
+
+# how long to wait for a transaction to be mined
+TX_TIMEOUT = 60 * 60
+
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+
+async def run(f, *args, **kwargs):
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, functools.partial(f, *args, **kwargs))
+
+
+def contract(address, container):
+    """
+    Plain web3 contract at `address` with the ABI of a brownie contract
+    container or interface, which can be used from worker threads
+    """
+    return web3.eth.contract(address, abi=container.abi)
+
+
+class NonceManager:
+    def __init__(self, account):
+        self.account = account
+        self.nonce = None
+        self.lock = asyncio.Lock()
+
+    def sign(self, fn, tx_params):
+        tx = fn.buildTransaction({"from": self.account.address, **tx_params})
+        return web3.eth.account.sign_transaction(tx, self.account.private_key)
+
+    async def send(self, fn, **tx_params):
+        """
+        Broadcast a transaction calling the web3 contract function `fn` with
+        the next nonce and return its hash without waiting for it to be mined.
+        Only one transaction is broadcast at a time so nonces are used in order
+        """
+        async with self.lock:
+            if self.nonce is None:
+                self.nonce = await run(
+                    web3.eth.getTransactionCount, self.account.address, "pending"
+                )
+            try:
+                signed = await run(self.sign, fn, {"nonce": self.nonce, **tx_params})
+                tx_hash = await run(web3.eth.sendRawTransaction, signed.rawTransaction)
+            except Exception:
+                # nonce might or might not have been used so fetch it again
+                self.nonce = None
+                raise
+            self.nonce += 1
+        return tx_hash
+
+
+async def wait(tx_hash):
+    """
+    Receipt of a mined transaction and the timestamp of its block. Raises if
+    the transaction reverted
+    """
+    receipt = await run(web3.eth.waitForTransactionReceipt, tx_hash, TX_TIMEOUT)
+    if receipt["status"] == 0:
+        raise ValueError(f"Transaction {tx_hash.hex()} reverted")
+    block = await run(web3.eth.getBlock, receipt["blockNumber"])
+    return receipt, block["timestamp"]
+
+
+class ChainClock:
+    def __init__(self):
+        self.offset = None
+        self.last_poll = 0
+
+    async def sync(self):
+        block = await run(web3.eth.getBlock, "latest")
+        offset = block["timestamp"] - time.time()
+
+        # latest block could have been mined a while ago so don't move the
+        # clock back if no new block has been mined since the last poll
+        if self.offset is None or offset > self.offset:
+            self.offset = offset
+        self.last_poll = time.time()
+
+    async def now(self):
+        """
+        Estimated timestamp of a block mined now
+        """
+        if self.offset is None or time.time() - self.last_poll > POLL_INTERVAL:
+            await self.sync()
+        return time.time() + self.offset
+
+    async def sleep_until(self, timestamp):
+        """
+        Sleep until `timestamp` or the next poll of the latest block
+        """
+        delay = timestamp - await self.now()
+        if delay > 0:
+            await asyncio.sleep(min(delay, POLL_INTERVAL))
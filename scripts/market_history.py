@@ -0,0 +1,143 @@
+"""
+Reconstructs the supply, cost and price history of OptionsMarketMaker markets
+from their `Trade` events
+
+Every `Trade` event includes `newLongSupply` and `newShortSupply`, so the state
+of a market after each trade is known without calling `totalSupply` on an
+archive node. Costs and prices are calculated with `batch_cost` and
+`batch_prices` and are expressed in base tokens
+
+Trades are read from the database written by `index_events` and market
+parameters from the cache written by `generate_options`. Histories are saved
+to `HISTORY_PATH` and later runs only replay trades after the last one saved
+
+Usage:
+>> brownie run index_events --network mainnet
+>> brownie run market_history --network mainnet
+
+"""
+
+import json
+import os
+
+import numpy as np
+from brownie import network
+
+from scripts.calc_lslmsr_cost import batch_cost
+from scripts.calc_lslmsr_prices import batch_prices
+from scripts.generate_options import CACHE_PATH
+from scripts.index_events import DB_PATH, connect
+
+
+SCALE = 10 ** 18
+HISTORY_PATH = "build/history/{network}/{market}.npz"
+
+COLUMNS = [
+    "block",
+    "log_index",
+    "long_supply",
+    "short_supply",
+    "cost",
+    "long_price",
+    "short_price",
+]
+
+
+class MarketHistory:
+    """
+    State of a market after each of its trades. Each column in `COLUMNS` is a
+    numpy array with one entry per trade. Supplies are in tokens, not wei
+    """
+
+    def __init__(self, alpha, is_put=False, strike_price=None):
+        self.alpha = alpha
+        self.is_put = is_put
+        self.strike_price = strike_price
+        for name in COLUMNS:
+            dtype = np.int64 if name in ["block", "log_index"] else np.float64
+            setattr(self, name, np.zeros(0, dtype=dtype))
+
+    def __len__(self):
+        return len(self.block)
+
+    @property
+    def last_event(self):
+        if len(self) == 0:
+            return (-1, -1)
+        return (int(self.block[-1]), int(self.log_index[-1]))
+
+    def update(self, blocks, log_indexes, new_long_supplies, new_short_supplies):
+        """
+        Append the state after new trades. Supplies are in wei
+        """
+        q1 = np.array([x / SCALE for x in new_long_supplies], dtype=np.float64)
+        q2 = np.array([x / SCALE for x in new_short_supplies], dtype=np.float64)
+        alpha = self.alpha / SCALE
+
+        # cost is multiplied by the strike price for puts
+        multiplier = self.strike_price / SCALE if self.is_put else 1.0
+        cost = batch_cost(q1, q2, alpha) * multiplier
+        prices = batch_prices(np.stack([q1, q2], axis=-1), alpha) * multiplier
+
+        new = {
+            "block": np.asarray(blocks, dtype=np.int64),
+            "log_index": np.asarray(log_indexes, dtype=np.int64),
+            "long_supply": q1,
+            "short_supply": q2,
+            "cost": cost,
+            "long_price": prices[:, 0],
+            "short_price": prices[:, 1],
+        }
+        for name in COLUMNS:
+            setattr(self, name, np.concatenate([getattr(self, name), new[name]]))
+
+    def update_from_db(self, db, market):
+        """
+        Replay trades of `market` in the `index_events` database that happened
+        after the last trade in this history
+        """
+        block, log_index = self.last_event
+        rows = db.execute(
+            "SELECT block, log_index, new_long_supply, new_short_supply FROM trades "
+            "WHERE market = ? AND (block > ? OR (block = ? AND log_index > ?)) "
+            "ORDER BY block, log_index",
+            (market, block, block, log_index),
+        ).fetchall()
+        if rows:
+            self.update(*zip(*rows))
+        return len(rows)
+
+    def save(self, path):
+        np.savez(
+            path,
+            params=np.array([self.alpha, self.is_put, self.strike_price], dtype=object),
+            **{name: getattr(self, name) for name in COLUMNS},
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path, allow_pickle=True)
+        history = cls(*data["params"])
+        for name in COLUMNS:
+            setattr(history, name, data[name])
+        return history
+
+
+def main():
+    with open(CACHE_PATH.format(network=network.show_active()), "r") as f:
+        markets = json.load(f)["markets"]
+    db = connect(DB_PATH.format(network=network.show_active()))
+
+    for market, fields in markets.items():
+        path = HISTORY_PATH.format(network=network.show_active(), market=market)
+        if os.path.exists(path):
+            history = MarketHistory.load(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            history = MarketHistory(
+                fields["alpha"], fields["isPutMarket"], fields["strikePrice"]
+            )
+
+        num_new = history.update_from_db(db, market)
+        history.save(path)
+        print(f"{market}: {num_new} new trades, {len(history)} total")
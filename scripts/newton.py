@@ -0,0 +1,35 @@
+"""
+Safeguarded Newton's method for solving many increasing equations at once
+
+Each element keeps a bracket that's narrowed after every evaluation. Newton
+steps are taken when they stay inside the bracket, otherwise the bracket is
+bisected, so every element converges even where the derivative is tiny
+
+"""
+
+import numpy as np
+
+
+def solve_bracketed(f, lo, hi, x, tolerance, max_iterations):
+    """
+    Solve f(x) = 0 elementwise for f increasing in x with lo <= x <= hi
+
+    `f` takes an array and returns the values and derivatives at each element.
+    Stops when every step is within `tolerance` relative to max(x, 1)
+    """
+    for _ in range(max_iterations):
+        diff, derivative = f(x)
+        lo = np.where(diff <= 0, x, lo)
+        hi = np.where(diff > 0, x, hi)
+
+        # take newton step if it stays inside the bracket, otherwise bisect
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = x - diff / derivative
+        inside = (newton > lo) & (newton < hi)
+        x_next = np.where(inside, newton, (lo + hi) / 2)
+
+        done = np.abs(x_next - x) <= tolerance * np.maximum(x, 1.0)
+        x = x_next
+        if done.all():
+            break
+    return x
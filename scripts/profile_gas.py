@@ -0,0 +1,172 @@
+"""
+Profiles where gas goes when buying and selling on a development chain. Each
+transaction is traced and gas is attributed to the internal function or
+external call that spent it. Prints a flame-graph-style tree for each trade
+and saves collapsed stacks that can be passed to `flamegraph.pl`
+
+Usage:
+>> brownie run profile_gas
+"""
+
+import os
+
+from brownie import accounts, chain
+
+from scripts.benchmark_gas import (
+    buy,
+    deploy,
+    set_state,
+    STATES,
+    TRADE_SIZE,
+)
+
+
+PROFILE_PATH = "build/gas_profile/{name}.folded"
+
+# markets to profile, see `MARKETS` in benchmark_gas.py
+PROFILE_MARKETS = ["call", "put"]
+
+# hide functions that use less than this fraction of the total gas
+MIN_FRACTION = 0.005
+
+
+def step_costs(trace):
+    """
+    Gas used by each step of a trace. The cost of a call excludes gas used by
+    steps inside the called contract since those are counted separately
+    """
+    costs = [0] * len(trace)
+    calls = []
+    spent = 0
+    for i, step in enumerate(trace):
+        if i + 1 == len(trace):
+            cost = step["gasCost"]
+        elif trace[i + 1]["depth"] > step["depth"]:
+            calls.append((i, spent))
+            cost = 0
+        elif trace[i + 1]["depth"] == step["depth"]:
+            cost = step["gas"] - trace[i + 1]["gas"]
+        else:
+            cost = step["gasCost"]
+        costs[i] = cost
+        spent += cost
+
+        # returned from a call so cost of call is gas used since the call
+        # minus gas used by the called contract
+        if i + 1 < len(trace) and trace[i + 1]["depth"] < step["depth"]:
+            j, spent_before = calls.pop()
+            costs[j] = trace[j]["gas"] - trace[i + 1]["gas"] - (spent - spent_before)
+            spent += costs[j]
+    return costs
+
+
+def profile(trace):
+    """
+    Returns a dict mapping each stack of function names to [gas, calls] where
+    gas excludes gas used by functions further down the stack
+    """
+    costs = step_costs(trace)
+    frames = {}
+    stacks = {}
+    prev = ()
+    for step, cost in zip(trace, costs):
+        depth = step["depth"]
+        frame = frames.get(depth, [])[: step["jumpDepth"]]
+        frames[depth] = frame + [step["fn"] or "<unknown>"]
+
+        # forget frames of external calls that have returned
+        for d in [d for d in frames if d > depth]:
+            del frames[d]
+
+        stack = tuple(f for d in sorted(frames) for f in frames[d])
+        node = stacks.setdefault(stack, [0, 0])
+        node[0] += cost
+
+        # count a call each time a function is entered rather than returned to
+        if stack != prev[: len(stack)]:
+            node[1] += 1
+        prev = stack
+    return stacks
+
+
+def inclusive(stacks):
+    totals = {}
+    for stack, (gas, _) in stacks.items():
+        for i in range(1, len(stack) + 1):
+            totals[stack[:i]] = totals.get(stack[:i], 0) + gas
+    return totals
+
+
+def format_tree(stacks, gas_used):
+    """
+    Prints each function indented under its caller with its total and self gas
+    """
+    totals = inclusive(stacks)
+    traced = sum(gas for gas, _ in stacks.values())
+
+    lines = [f"{'total':>8} {'self':>8} {'%':>6} {'calls':>5}  function"]
+    lines.append(
+        f"{gas_used - traced:>8} {gas_used - traced:>8} "
+        f"{(gas_used - traced) / gas_used:>6.1%} {'':>5}  "
+        "<intrinsic gas and refunds>"
+    )
+
+    def visit(stack):
+        gas, calls = stacks.get(stack, [0, 0])
+        total = totals[stack]
+        if total < MIN_FRACTION * gas_used:
+            return
+        indent = "  " * (len(stack) - 1)
+        lines.append(
+            f"{total:>8} {gas:>8} {total / gas_used:>6.1%} {calls:>5}  "
+            f"{indent}{stack[-1]}"
+        )
+
+        children = [s for s in totals if len(s) == len(stack) + 1 and s[:-1] == stack]
+        for child in sorted(children, key=lambda s: -totals[s]):
+            visit(child)
+
+    for root in sorted([s for s in totals if len(s) == 1], key=lambda s: -totals[s]):
+        visit(root)
+    return "\n".join(lines)
+
+
+def format_folded(stacks):
+    return "\n".join(
+        ";".join(stack) + f" {gas}" for stack, (gas, _) in sorted(stacks.items()) if gas
+    )
+
+
+def save_folded(name, stacks):
+    path = PROFILE_PATH.format(name=name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(format_folded(stacks) + "\n")
+    return path
+
+
+def report(name, tx):
+    stacks = profile(tx.trace)
+    path = save_folded(name, stacks)
+
+    print(f"\n{name}: {tx.gas_used} gas")
+    print(format_tree(stacks, tx.gas_used))
+    print(f"Saved collapsed stacks to {path}")
+
+
+def main():
+    deployer, user = accounts[:2]
+    markets, _ = deploy(deployer, user)
+    chain.snapshot()
+
+    for market in PROFILE_MARKETS:
+        mm, _ = markets[market]
+        for state in STATES:
+            chain.revert()
+            set_state(mm, user, state)
+            report(f"buy_{market}_{state}", buy(mm, user, TRADE_SIZE, 0))
+
+            # user holds the long tokens just bought so can always sell them
+            tx = mm.sell(TRADE_SIZE, 0, 0, {"from": user})
+            report(f"sell_{market}_{state}", tx)
+    chain.revert()
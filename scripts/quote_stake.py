@@ -0,0 +1,217 @@
+"""
+Quotes `maxAmountIn` for SeedRewards.stake
+
+`stake(shares, maxAmountIn)` calls `marketMaker.buy(shares, shares, maxAmountIn)`
+and refunds whatever wasn't spent, so a `maxAmountIn` that's too high locks up
+capital until the refund and one that's too low reverts with "Max slippage
+exceeded". The cost of buying `shares` long and `shares` short is calculated
+with `calc_lslmsr_cost_exact.cost`, so it matches the contract to the wei for
+both call and put markets
+
+Trades that could be mined before the stake are passed as `pending`. Any
+subset of them could be mined first, so `maxAmountIn` is the cost after the
+subset that makes the stake most expensive. This is exact for up to
+`MAX_EXACT_PENDING` trades and a local search beyond that. An extra relative
+buffer can be added with `buffer_bps`
+
+When run as a script, pending trades are decoded from buys and sells on the
+market and stakes and withdrawals on SeedRewards in the node's pending block
+
+Usage:
+>> brownie run quote_stake main <seed_rewards> <shares> [<shares> ...] --network mainnet
+
+"""
+
+import numpy as np
+from brownie import web3, OptionsMarketMaker, OptionsToken, SeedRewards
+
+from scripts.calc_lslmsr_cost import batch_cost
+from scripts.calc_lslmsr_cost_exact import SCALE, cost
+from scripts.rpc_batch import batch_call
+
+
+BPS = 10000
+
+# pending trades are enumerated exactly up to this many, i.e. 2^12 subsets
+MAX_EXACT_PENDING = 12
+
+# relative error of float64 costs when comparing supplies
+FLOAT_TOLERANCE = 1e-12
+
+
+def calc_stake_cost(long_supply, short_supply, alpha, shares, is_put, strike_price):
+    """
+    Exact amount of base tokens spent by `buy(shares, shares, maxAmountIn)`
+    """
+    cost1 = cost(long_supply, short_supply, alpha, is_put, strike_price)
+    cost2 = cost(
+        long_supply + shares, short_supply + shares, alpha, is_put, strike_price
+    )
+    return cost2 - cost1
+
+
+def enumerate_supplies(long_supply, short_supply, pending):
+    """
+    Distinct supplies after any subset of `pending` trades is mined. Buys can
+    always be mined before sells, so a subset is possible if and only if the
+    supplies after it aren't negative
+    """
+    deltas = {(0, 0)}
+    for d1, d2 in pending:
+        deltas |= {(a + d1, b + d2) for a, b in deltas}
+    supplies = [(long_supply + a, short_supply + b) for a, b in deltas]
+    return [(q1, q2) for q1, q2 in supplies if q1 >= 0 and q2 >= 0]
+
+
+def search_supplies(long_supply, short_supply, pending, stake_cost):
+    """
+    Local search over subsets of `pending` for when there are too many trades
+    to enumerate. Adds or removes one trade at a time while that increases
+    `stake_cost`, so it can miss the worst case
+    """
+    included = [False] * len(pending)
+    q = (long_supply, short_supply)
+    amount_in = stake_cost(*q)
+
+    improved = True
+    while improved:
+        improved = False
+        for i, (d1, d2) in enumerate(pending):
+            sign = -1 if included[i] else 1
+            q_next = (q[0] + sign * d1, q[1] + sign * d2)
+            if q_next[0] < 0 or q_next[1] < 0:
+                continue
+            amount_in_next = stake_cost(*q_next)
+            if amount_in_next > amount_in:
+                q, amount_in = q_next, amount_in_next
+                included[i] = not included[i]
+                improved = True
+    return q
+
+
+def calc_worst_supplies(
+    long_supply, short_supply, alpha, shares, pending, is_put, strike_price
+):
+    """
+    Supplies after the subset of `pending` trades that makes staking `shares`
+    most expensive, since any subset could be mined before the stake. Each
+    trade is a pair of changes in long and short supply, negative for sells
+
+    Exact for up to `MAX_EXACT_PENDING` trades. Costs of all possible supplies
+    are compared in float64 first and only those close to the maximum are
+    calculated exactly
+    """
+
+    def stake_cost(q1, q2):
+        return calc_stake_cost(q1, q2, alpha, shares, is_put, strike_price)
+
+    if len(pending) > MAX_EXACT_PENDING:
+        return search_supplies(long_supply, short_supply, pending, stake_cost)
+
+    supplies = enumerate_supplies(long_supply, short_supply, pending)
+    q = np.array(supplies, dtype=np.float64) / SCALE
+    s, a = shares / SCALE, alpha / SCALE
+    cost1 = batch_cost(q[:, 0], q[:, 1], a)
+    cost2 = batch_cost(q[:, 0] + s, q[:, 1] + s, a)
+
+    # float64 differences of large costs are only accurate relative to the
+    # costs themselves
+    diff = cost2 - cost1
+    tolerance = FLOAT_TOLERANCE * cost2.max()
+    candidates = np.flatnonzero(diff >= diff.max() - tolerance)
+    return max((supplies[i] for i in candidates), key=lambda q: stake_cost(*q))
+
+
+def quote_stake(
+    long_supply,
+    short_supply,
+    alpha,
+    shares_list,
+    is_put=False,
+    strike_price=None,
+    pending=(),
+    buffer_bps=0,
+):
+    """
+    Returns a list of (amount in, max amount in) for each of `shares_list`.
+    Amount in is the exact cost at the current supplies and max amount in is
+    the cost after the worst of the `pending` trades plus `buffer_bps`
+    """
+    pending = list(pending)
+    quotes = []
+    for shares in shares_list:
+        amount_in = calc_stake_cost(
+            long_supply, short_supply, alpha, shares, is_put, strike_price
+        )
+        q1, q2 = calc_worst_supplies(
+            long_supply, short_supply, alpha, shares, pending, is_put, strike_price
+        )
+        worst = calc_stake_cost(q1, q2, alpha, shares, is_put, strike_price)
+
+        # round buffer up so it's never 0 when `buffer_bps` > 0
+        max_amount_in = worst + -(-worst * buffer_bps // BPS)
+        quotes.append((amount_in, max_amount_in))
+    return quotes
+
+
+def decode_pending_trades(txs, market, seed_rewards):
+    """
+    Changes in long and short supply from transactions calling `buy` or `sell`
+    on `market` or `stake` or `withdraw` on `seed_rewards`
+    """
+    contracts = {
+        market: web3.eth.contract(market, abi=OptionsMarketMaker.abi),
+        seed_rewards: web3.eth.contract(seed_rewards, abi=SeedRewards.abi),
+    }
+    trades = []
+    for tx in txs:
+        if tx["to"] not in contracts:
+            continue
+        try:
+            func, args = contracts[tx["to"]].decode_function_input(tx["input"])
+        except ValueError:
+            continue
+
+        name = func.fn_name
+        if name == "buy":
+            trades.append((args["longSharesOut"], args["shortSharesOut"]))
+        elif name == "sell":
+            trades.append((-args["longSharesIn"], -args["shortSharesIn"]))
+        elif name == "stake":
+            trades.append((args["shares"], args["shares"]))
+        elif name == "withdraw":
+            trades.append((-args["shares"], -args["shares"]))
+
+        # `exit` withdraws the sender's whole balance, which isn't in the
+        # calldata, so it's skipped
+    return trades
+
+
+def main(seed_rewards, *shares_list):
+    seed_rewards = web3.toChecksumAddress(seed_rewards)
+    (market,) = batch_call([(seed_rewards, SeedRewards.abi, "marketMaker", ())])
+
+    names = ["longToken", "shortToken", "alpha", "isPutMarket", "strikePrice"]
+    results = batch_call((market, OptionsMarketMaker.abi, name, ()) for name in names)
+    long_token, short_token, alpha, is_put, strike_price = results
+
+    abi = OptionsToken.abi
+    long_supply, short_supply = batch_call(
+        [(long_token, abi, "totalSupply", ()), (short_token, abi, "totalSupply", ())]
+    )
+
+    block = web3.eth.getBlock("pending", full_transactions=True)
+    pending = decode_pending_trades(block["transactions"], market, seed_rewards)
+    print(f"{len(pending)} pending trades")
+
+    quotes = quote_stake(
+        long_supply,
+        short_supply,
+        alpha,
+        [int(s) for s in shares_list],
+        is_put,
+        strike_price,
+        pending,
+    )
+    for shares, (amount_in, max_amount_in) in zip(shares_list, quotes):
+        print(f"{shares}: amountIn {amount_in} maxAmountIn {max_amount_in}")
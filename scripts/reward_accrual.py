@@ -0,0 +1,201 @@
+"""
+Replays the events of a StakingRewards or SeedRewards pool to calculate the
+rewards earned by every account at any time without calling `earned` for
+each account on an archive node
+
+`Staked`, `Withdrawn`, `RewardPaid`, `RewardAdded` and
+`RewardsDurationUpdated` are applied in order through the same
+`rewardPerTokenStored` and `userRewardPerTokenPaid` accumulators and integer
+rounding as the contracts. Each event updates one account, and `earned` is
+then evaluated for all accounts at once with numpy object arrays of python
+ints
+
+Calling `getReward` when nothing is owed updates the accumulators without
+emitting an event. Since the contracts round down at every update, results
+can differ from `earned` by a few wei in that case
+
+Usage:
+>> brownie run reward_accrual main <pool> [<timestamp>] --network mainnet
+
+"""
+
+import json
+
+import numpy as np
+from brownie import web3, StakingRewards
+
+from scripts.event_logs import get_event_abis, get_logs
+from scripts.index_events import CONFIRMATIONS, START_BLOCK
+from scripts.rpc_batch import get_block_timestamps
+
+
+SCALE = 10 ** 18
+
+# initial value of `rewardsDuration` in both contracts
+DEFAULT_REWARDS_DURATION = 7 * 24 * 60 * 60
+
+EVENTS = [
+    "Staked",
+    "Withdrawn",
+    "RewardPaid",
+    "RewardAdded",
+    "RewardsDurationUpdated",
+]
+
+
+class RewardAccrual:
+    def __init__(self, rewards_duration=DEFAULT_REWARDS_DURATION):
+        self.period_finish = 0
+        self.reward_rate = 0
+        self.rewards_duration = rewards_duration
+        self.last_update_time = 0
+        self.reward_per_token_stored = 0
+        self.total_supply = 0
+        self.timestamp = 0
+
+        self.accounts = {}
+        self.balances = []
+        self.user_reward_per_token_paid = []
+        self.rewards = []
+
+        # total paid out to each account by `getReward`
+        self.claimed = []
+
+        # `RewardPaid` events whose amount didn't match the replayed rewards
+        self.mismatches = []
+
+    def index(self, account):
+        if account not in self.accounts:
+            self.accounts[account] = len(self.accounts)
+            for values in [
+                self.balances,
+                self.user_reward_per_token_paid,
+                self.rewards,
+                self.claimed,
+            ]:
+                values.append(0)
+        return self.accounts[account]
+
+    def last_time_reward_applicable(self, timestamp):
+        return min(timestamp, self.period_finish)
+
+    def reward_per_token(self, timestamp):
+        if self.total_supply == 0:
+            return self.reward_per_token_stored
+        elapsed = self.last_time_reward_applicable(timestamp) - self.last_update_time
+        return (
+            self.reward_per_token_stored
+            + elapsed * self.reward_rate * SCALE // self.total_supply
+        )
+
+    def update_reward(self, timestamp, i=None):
+        self.reward_per_token_stored = self.reward_per_token(timestamp)
+        self.last_update_time = self.last_time_reward_applicable(timestamp)
+        if i is not None:
+            paid = self.user_reward_per_token_paid[i]
+            self.rewards[i] += (
+                self.balances[i] * (self.reward_per_token_stored - paid) // SCALE
+            )
+            self.user_reward_per_token_paid[i] = self.reward_per_token_stored
+
+    def notify_reward_amount(self, timestamp, reward):
+        self.update_reward(timestamp)
+        if timestamp >= self.period_finish:
+            self.reward_rate = reward // self.rewards_duration
+        else:
+            leftover = (self.period_finish - timestamp) * self.reward_rate
+            self.reward_rate = (reward + leftover) // self.rewards_duration
+        self.last_update_time = timestamp
+        self.period_finish = timestamp + self.rewards_duration
+
+    def apply(self, event, args, timestamp):
+        """
+        Apply an event emitted in a block with timestamp `timestamp`. Events
+        must be applied in the order they were emitted
+        """
+        if timestamp < self.timestamp:
+            raise ValueError("Events must be applied in order")
+        self.timestamp = timestamp
+
+        if event == "RewardAdded":
+            self.notify_reward_amount(timestamp, args["reward"])
+        elif event == "RewardsDurationUpdated":
+            self.rewards_duration = args["newDuration"]
+        elif event in ["Staked", "Withdrawn", "RewardPaid"]:
+            i = self.index(args["user"])
+            self.update_reward(timestamp, i)
+            if event == "Staked":
+                self.total_supply += args["amount"]
+                self.balances[i] += args["amount"]
+            elif event == "Withdrawn":
+                self.total_supply -= args["amount"]
+                self.balances[i] -= args["amount"]
+            else:
+                if self.rewards[i] != args["reward"]:
+                    self.mismatches.append(
+                        (args["user"], self.rewards[i], args["reward"])
+                    )
+                self.claimed[i] += args["reward"]
+                self.rewards[i] = 0
+
+    def earned(self, timestamp):
+        """
+        Rewards earned and not yet claimed by every account at `timestamp`,
+        which can't be before the last event applied. Returned in the same
+        order as `accounts`
+        """
+        if timestamp < self.timestamp:
+            raise ValueError("Timestamp is before last event applied")
+        balances = np.array(self.balances, dtype=object)
+        paid = np.array(self.user_reward_per_token_paid, dtype=object)
+        rewards = np.array(self.rewards, dtype=object)
+        return balances * (self.reward_per_token(timestamp) - paid) // SCALE + rewards
+
+    def replay(self, events, timestamps):
+        """
+        Apply `events` in order and yield `earned` at each of `timestamps`,
+        which must be in ascending order. `events` are (event, args, timestamp)
+        """
+        events = iter(events)
+        pending = next(events, None)
+        for timestamp in timestamps:
+            while pending is not None and pending[2] <= timestamp:
+                self.apply(*pending)
+                pending = next(events, None)
+            yield self.earned(timestamp)
+
+
+def fetch_events(pool, from_block, to_block):
+    """
+    Decoded events of `pool` as (event, args, timestamp) in the order they
+    were emitted
+    """
+    events = get_event_abis(StakingRewards.abi, EVENTS)
+    logs = []
+    for _, chunk in get_logs([pool], events, from_block, to_block):
+        logs.extend(chunk)
+
+    timestamps = get_block_timestamps(sorted(set(log["blockNumber"] for log in logs)))
+    return [(log["event"], log["args"], timestamps[log["blockNumber"]]) for log in logs]
+
+
+def main(pool, timestamp=None):
+    to_block = web3.eth.blockNumber - CONFIRMATIONS
+    events = fetch_events(pool, START_BLOCK, to_block)
+    if timestamp is None:
+        timestamp = web3.eth.getBlock(to_block)["timestamp"]
+
+    accrual = RewardAccrual()
+    (earned,) = accrual.replay(events, [int(timestamp)])
+    if accrual.mismatches:
+        print(f"{len(accrual.mismatches)} RewardPaid events didn't match")
+
+    result = {
+        account: {
+            "balance": str(accrual.balances[i]),
+            "earned": str(earned[i]),
+            "claimed": str(accrual.claimed[i]),
+        }
+        for account, i in accrual.accounts.items()
+    }
+    print(json.dumps(result, indent=4, sort_keys=True))
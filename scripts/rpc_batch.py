@@ -0,0 +1,141 @@
+"""
+Helpers for sending many contract calls in a single JSON-RPC batch request
+
+Each call is a tuple of (address, abi, method name, args). Calls are encoded
+with the abi, sent as `eth_call` requests in batches of up to `BATCH_SIZE` and
+the results are decoded in the same order as the calls
+
+`get_block_timestamps` fetches the timestamps of many blocks the same way
+
+Batches are only supported over HTTP. With other providers, e.g. IPC or
+websockets, the requests are sent one at a time through web3 instead
+
+"""
+
+import requests
+from brownie import web3
+from eth_abi import decode_abi, encode_abi
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+
+
+BATCH_SIZE = 500
+
+# seconds to wait for the node to respond to a batch
+TIMEOUT = 60
+
+
+class BatchCallError(Exception):
+    pass
+
+
+def get_function_abi(abi, name):
+    for item in abi:
+        if item.get("type") == "function" and item["name"] == name:
+            return item
+    raise ValueError(f"Function {name} not found in abi")
+
+
+def encode_call(abi, name, args=()):
+    fn = get_function_abi(abi, name)
+    types = [x["type"] for x in fn["inputs"]]
+    data = function_abi_to_4byte_selector(fn) + encode_abi(types, args)
+    return "0x" + data.hex()
+
+
+def decode_result(abi, name, data):
+    fn = get_function_abi(abi, name)
+    types = [x["type"] for x in fn["outputs"]]
+    values = decode_abi(types, bytes.fromhex(data[2:]))
+    values = [
+        to_checksum_address(v) if t == "address" else v for t, v in zip(types, values)
+    ]
+    return values[0] if len(values) == 1 else tuple(values)
+
+
+def send_batch(payload):
+    """
+    Send a list of JSON-RPC requests and return the list of responses
+    """
+    # batches need HTTP so send requests one at a time with other providers
+    endpoint = getattr(web3.provider, "endpoint_uri", None)
+    if not str(endpoint).startswith(("http://", "https://")):
+        return [
+            {**web3.provider.make_request(r["method"], r["params"]), "id": r["id"]}
+            for r in payload
+        ]
+
+    response = requests.post(endpoint, json=payload, timeout=TIMEOUT)
+    response.raise_for_status()
+    responses = response.json()
+
+    # nodes that reject the whole batch reply with a single error object
+    if not isinstance(responses, list):
+        raise BatchCallError(f"Batch request failed: {responses}")
+    return responses
+
+
+def batch_call(calls, block_identifier="latest", allow_failure=False):
+    """
+    Execute `calls` using as few round-trips as possible and return their
+    decoded return values
+
+    If `allow_failure` is true, calls that revert or return nothing that can
+    be decoded return a `BatchCallError` instead of raising it
+    """
+    if isinstance(block_identifier, int):
+        block_identifier = hex(block_identifier)
+
+    calls = list(calls)
+    requests_ = [
+        {
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "eth_call",
+            "params": [
+                {"to": str(address), "data": encode_call(abi, name, args)},
+                block_identifier,
+            ],
+        }
+        for i, (address, abi, name, args) in enumerate(calls)
+    ]
+
+    results = [None] * len(calls)
+    for start in range(0, len(requests_), BATCH_SIZE):
+        for response in send_batch(requests_[start : start + BATCH_SIZE]):
+            i = response["id"]
+            address, abi, name, _ = calls[i]
+            try:
+                if "error" in response:
+                    raise BatchCallError(f"{name} on {address}: {response['error']}")
+                try:
+                    results[i] = decode_result(abi, name, response["result"])
+                except Exception as e:
+                    raise BatchCallError(f"{name} on {address}: {e}") from e
+            except BatchCallError as e:
+                if not allow_failure:
+                    raise
+                results[i] = e
+    return results
+
+
+def get_block_timestamps(blocks):
+    """
+    Fetch timestamps of `blocks` with JSON-RPC batch requests
+    """
+    blocks = list(blocks)
+    timestamps = {}
+    for start in range(0, len(blocks), BATCH_SIZE):
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": block,
+                "method": "eth_getBlockByNumber",
+                "params": [hex(block), False],
+            }
+            for block in blocks[start : start + BATCH_SIZE]
+        ]
+        for response in send_batch(payload):
+            if "error" in response:
+                raise BatchCallError(f"Block {response['id']}: {response['error']}")
+            timestamps[response["id"]] = int(response["result"]["timestamp"], 16)
+    return timestamps
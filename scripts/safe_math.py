@@ -0,0 +1,40 @@
+"""
+Port of the OpenZeppelin SafeMath operations used by the contracts
+
+Operations on uint256 which would overflow or underflow raise `Revert`, the
+same way the contracts revert
+
+"""
+
+UINT256_MAX = (1 << 256) - 1
+
+
+class Revert(Exception):
+    pass
+
+
+def require(condition):
+    if not condition:
+        raise Revert()
+
+
+def add(a, b):
+    c = a + b
+    require(c <= UINT256_MAX)
+    return c
+
+
+def sub(a, b):
+    require(b <= a)
+    return a - b
+
+
+def mul(a, b):
+    c = a * b
+    require(c <= UINT256_MAX)
+    return c
+
+
+def div(a, b):
+    require(b > 0)
+    return a // b
@@ -0,0 +1,177 @@
+"""
+Keeper that calls `settle` on every market created by OptionsFactory as soon
+as it expires
+
+Markets are read from `OptionsFactory.markets` and kept in a heap ordered by
+`expiryTime`. Markets that are already settled are skipped. Settle
+transactions for markets expiring at the same time are sent concurrently with
+local nonces and the time from expiry to the block the settlement was mined
+in is reported for each market
+
+In watch mode the factory is checked every `REFRESH_INTERVAL` seconds for new
+markets and the keeper runs forever. In dry-run mode `settle` is only
+simulated with `eth_call`
+
+The factory address is looked up in `FACTORY` by network, with forks such as
+`mainnet-fork` using the address of the network they fork. It can also be
+passed after the mode, which is `once`, `watch` or `dry`
+
+Usage:
+>> brownie run settle_keeper --network rinkeby
+>> brownie run settle_keeper main watch --network rinkeby
+>> brownie run settle_keeper main dry --network rinkeby-fork
+>> brownie run settle_keeper main once <factory> --network mainnet
+
+"""
+
+import asyncio
+import heapq
+
+from brownie import accounts, network, OptionsFactory, OptionsMarketMaker
+
+from scripts.keeper import ChainClock, NonceManager, contract, run, wait
+from scripts.rpc_batch import batch_call
+
+
+ACCOUNT = "keeper"
+
+# OptionsFactory address on each network
+FACTORY = {
+    "rinkeby": "0x869C636deeA101f11a0A37e1f179329C1a2bAFCa",
+}
+
+REFRESH_INTERVAL = 60 * 60
+
+# `settle` reverts before expiry so wait this long for a block after expiry to
+# be mined, otherwise gas estimation against the latest block would fail
+SETTLE_DELAY = 15
+
+
+def fetch_markets(factory, start):
+    """
+    Addresses of markets created by `factory` from index `start` onwards
+    """
+    (num_markets,) = batch_call([(factory, OptionsFactory.abi, "numMarkets", ())])
+    return batch_call(
+        (factory, OptionsFactory.abi, "markets", (i,))
+        for i in range(start, num_markets)
+    )
+
+
+class SettleKeeper:
+    def __init__(self, account, factory, dry_run=False):
+        self.account = account
+        self.factory = factory
+        self.dry_run = dry_run
+        self.nonces = NonceManager(account)
+        self.clock = ChainClock()
+
+        # heap of (expiry time, market address)
+        self.queue = []
+        self.num_markets = 0
+        self.latencies = {}
+        self.tasks = []
+
+    def load(self):
+        """
+        Add unsettled markets created since the last call to the queue
+        """
+        markets = fetch_markets(self.factory, self.num_markets)
+        self.num_markets += len(markets)
+
+        results = batch_call(
+            (market, OptionsMarketMaker.abi, name, ())
+            for market in markets
+            for name in ["expiryTime", "isSettled"]
+        )
+        for i, market in enumerate(markets):
+            expiry_time, is_settled = results[2 * i], results[2 * i + 1]
+            if not is_settled:
+                heapq.heappush(self.queue, (expiry_time, market))
+        return len(markets)
+
+    async def settle(self, address, expiry_time):
+        mm = contract(address, OptionsMarketMaker)
+
+        # could have been settled by someone else since it was loaded
+        if await run(mm.functions.isSettled().call):
+            print(f"{address}: already settled")
+            return
+
+        try:
+            if self.dry_run:
+                await run(mm.functions.settle().call, {"from": self.account.address})
+                print(f"{address}: settle would succeed")
+                return
+            tx_hash = await self.nonces.send(mm.functions.settle())
+            _, timestamp = await wait(tx_hash)
+        except Exception as e:
+            print(f"{address}: settle failed: {e}")
+            return
+
+        latency = timestamp - expiry_time
+        self.latencies[address] = latency
+        print(f"{address}: settled {latency}s after expiry in {tx_hash.hex()}")
+
+    async def run(self, watch=False):
+        last_refresh = await self.clock.now()
+        while self.queue or watch:
+            now = await self.clock.now()
+            if watch and now - last_refresh > REFRESH_INTERVAL:
+                num_new = await run(self.load)
+                print(f"{num_new} new markets")
+                last_refresh = now
+
+            due = self.queue[0][0] + SETTLE_DELAY if self.queue else None
+            if due is None or now < due:
+                next_refresh = last_refresh + REFRESH_INTERVAL
+                await self.clock.sleep_until(min(due or next_refresh, next_refresh))
+                continue
+
+            expiry_time, address = heapq.heappop(self.queue)
+            self.tasks = [t for t in self.tasks if not t.done()]
+            self.tasks.append(asyncio.ensure_future(self.settle(address, expiry_time)))
+
+        await asyncio.gather(*self.tasks)
+
+    def report(self):
+        if not self.latencies:
+            return
+        latencies = sorted(self.latencies.values())
+        print(
+            f"Settled {len(latencies)} markets. Latency from expiry: "
+            f"median {latencies[len(latencies) // 2]}s, max {latencies[-1]}s"
+        )
+
+
+def get_factory(network_name):
+    """
+    Address of OptionsFactory on `network_name` or the network it forks
+    """
+    if network_name.endswith("-fork"):
+        network_name = network_name[: -len("-fork")]
+    factory = FACTORY.get(network_name)
+    if not factory:
+        raise ValueError(
+            f"No OptionsFactory address known for {network_name}. Pass it as "
+            "`brownie run settle_keeper main <mode> <factory>`"
+        )
+    return factory
+
+
+def main(mode=None, factory=None):
+    factory = factory or get_factory(network.show_active())
+    dry_run = mode == "dry"
+    account = accounts[0] if dry_run else accounts.load(ACCOUNT)
+
+    keeper = SettleKeeper(account, factory, dry_run)
+    keeper.load()
+
+    loop = asyncio.get_event_loop()
+    now = loop.run_until_complete(keeper.clock.now())
+    print(f"{keeper.num_markets} markets, {len(keeper.queue)} not settled")
+    for expiry_time, address in sorted(keeper.queue):
+        print(f"  {expiry_time - now:>10.0f}s  {address}")
+
+    loop.run_until_complete(keeper.run(watch=mode == "watch"))
+    keeper.report()
@@ -0,0 +1,279 @@
+"""
+Vectorized model of OptionsMarketMaker for simulating many independent paths
+of trades at once
+
+Each path is a separate market with its own long and short supply, base token
+balance and agents' positions. `buy`, `sell`, `settle`, `calc_payoff` and
+`redeem` follow the contract, including the put inversion, but use float64
+and amounts in tokens rather than wei. Trades that the contract would revert
+on a path are skipped on that path and return 0
+
+`simulate` runs random trader flow against a market seeded with equal long
+and short shares by agent 0, like `SeedRewards`, and settles at a price drawn
+from a lognormal distribution
+
+Usage:
+>> python -m scripts.simulate_market <n_paths> <liquidity_param> [<is_put>]
+
+liquidity_param describes maximum possible sum of prices - 1. It's equal to alpha * 2 log 2
+
+"""
+
+import numpy as np
+
+from scripts.calc_lslmsr_cost import batch_cost
+
+
+class MarketSimulator:
+    def __init__(self, n_paths, n_agents, alpha, is_put=False, strike_price=1.0):
+        self.n_paths = n_paths
+        self.n_agents = n_agents
+        self.alpha = alpha
+        self.is_put = is_put
+        self.strike_price = strike_price
+
+        # full set of long and short shares always pays out this many base
+        # tokens, i.e. 1 for calls and the strike price for puts
+        self.unit = strike_price if is_put else 1.0
+
+        self.long_balances = np.zeros((n_paths, n_agents))
+        self.short_balances = np.zeros((n_paths, n_agents))
+
+        # base tokens received minus base tokens paid by each agent
+        self.cash = np.zeros((n_paths, n_agents))
+
+        self.balance = np.zeros(n_paths)
+        self.is_settled = np.zeros(n_paths, dtype=bool)
+        self.settlement_price = np.zeros(n_paths)
+
+    @property
+    def long_supply(self):
+        return self.long_balances.sum(axis=1)
+
+    @property
+    def short_supply(self):
+        return self.short_balances.sum(axis=1)
+
+    def cost(self, long_supply=None, short_supply=None):
+        if long_supply is None:
+            long_supply, short_supply = self.long_supply, self.short_supply
+        return self.unit * batch_cost(long_supply, short_supply, self.alpha)
+
+    def _trade(self, agents, long_shares, short_shares, sign, ok, limit):
+        rows = np.arange(self.n_paths)
+        long1, short1 = self.long_supply, self.short_supply
+        long2 = long1 + sign * np.where(ok, long_shares, 0.0)
+        short2 = short1 + sign * np.where(ok, short_shares, 0.0)
+        amounts = sign * (self.cost(long2, short2) - self.cost(long1, short1))
+
+        # contract requires amount > 0 and checks slippage
+        ok &= (amounts > 0) & (sign * amounts <= sign * limit)
+        amounts = np.where(ok, amounts, 0.0)
+        long_shares = np.where(ok, long_shares, 0.0)
+        short_shares = np.where(ok, short_shares, 0.0)
+
+        self.long_balances[rows, agents] += sign * long_shares
+        self.short_balances[rows, agents] += sign * short_shares
+        self.cash[rows, agents] -= sign * amounts
+        self.balance += sign * amounts
+        return amounts
+
+    def buy(self, agents, long_shares, short_shares, max_amount_in=np.inf):
+        """
+        Each path's agent `agents[i]` buys `long_shares[i]` long and
+        `short_shares[i]` short shares. Skipped on paths where the cost would be
+        more than `max_amount_in`. Returns the amount paid on each path
+        """
+        agents, long_shares, short_shares, max_amount_in = np.broadcast_arrays(
+            agents, long_shares, short_shares, max_amount_in
+        )
+        agents = np.broadcast_to(agents, (self.n_paths,))
+        ok = ~self.is_settled & ((long_shares > 0) | (short_shares > 0))
+        return self._trade(agents, long_shares, short_shares, 1, ok, max_amount_in)
+
+    def sell(self, agents, long_shares, short_shares, min_amount_out=0.0):
+        """
+        Each path's agent `agents[i]` sells `long_shares[i]` long and
+        `short_shares[i]` short shares. Skipped on paths where the agent doesn't
+        hold enough shares or would receive less than `min_amount_out`. Returns
+        the amount received on each path
+        """
+        agents, long_shares, short_shares, min_amount_out = np.broadcast_arrays(
+            agents, long_shares, short_shares, min_amount_out
+        )
+        agents = np.broadcast_to(agents, (self.n_paths,))
+        rows = np.arange(self.n_paths)
+        ok = ~self.is_settled & ((long_shares > 0) | (short_shares > 0))
+        ok &= long_shares <= self.long_balances[rows, agents]
+        ok &= short_shares <= self.short_balances[rows, agents]
+        return self._trade(agents, long_shares, short_shares, -1, ok, min_amount_out)
+
+    def settle(self, settlement_price):
+        """
+        Settles all paths that haven't been settled yet at `settlement_price`
+        which can be different for each path
+        """
+        price = np.broadcast_to(settlement_price, (self.n_paths,))
+        self.settlement_price = np.where(self.is_settled, self.settlement_price, price)
+        self.is_settled[:] = True
+
+    def _payoffs_per_share(self):
+        """
+        p1 = max(S - K, 0) and p2 = min(S, K) with S and K inverted for puts
+        """
+        s, k = self.settlement_price, self.strike_price
+        if self.is_put:
+            s, k = 1.0 / s, 1.0 / k
+        return np.maximum(s - k, 0.0), np.minimum(s, k)
+
+    def calc_payoff(self, long_shares, short_shares):
+        """
+        Payoff on each path for redeeming `long_shares` and `short_shares`.
+        Arrays can have an extra trailing agent axis
+        """
+        if not np.all(self.is_settled):
+            raise ValueError("Cannot be called before settlement")
+
+        p1, p2 = self._payoffs_per_share()
+        denom = p1 * self.long_supply + p2 * self.short_supply
+        long_shares, short_shares = np.asarray(long_shares), np.asarray(short_shares)
+        if long_shares.ndim == 2:
+            p1, p2, denom = p1[:, None], p2[:, None], denom[:, None]
+            balance = self.balance[:, None]
+        else:
+            balance = self.balance
+
+        numer = balance * (long_shares * p1 + short_shares * p2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(denom > 0, numer / denom, 0.0)
+
+    def redeem(self):
+        """
+        All agents redeem all their shares. Returns payouts with shape
+        (n_paths, n_agents)
+
+        Redeeming one at a time in the contract reduces the balance and the
+        denominator in proportion so payouts don't depend on the order
+        """
+        payouts = self.calc_payoff(self.long_balances, self.short_balances)
+        self.cash += payouts
+        self.balance -= payouts.sum(axis=1)
+        self.long_balances[:] = 0.0
+        self.short_balances[:] = 0.0
+        return payouts
+
+    def liability(self):
+        """
+        Base tokens needed to pay every outstanding share its intrinsic value
+        at the settlement price. A full set of long and short shares is worth
+        `unit` and p1 + p2 = S so each long share is worth `unit * p1 / S`
+        """
+        p1, p2 = self._payoffs_per_share()
+        s = p1 + p2
+        return self.unit * (p1 * self.long_supply + p2 * self.short_supply) / s
+
+    def spread(self):
+        """
+        Balance in excess of the worst-case payout of `unit` for each share of
+        the side with the larger supply. This is the amount captured by the
+        LS-LMSR spread and is shared between holders on redemption
+        """
+        return self.balance - self.unit * np.maximum(
+            self.long_supply, self.short_supply
+        )
+
+
+def simulate(
+    n_paths,
+    alpha,
+    is_put=False,
+    strike_price=1.0,
+    spot_price=1.0,
+    volatility=0.8,
+    expiry_years=1 / 12,
+    n_steps=100,
+    n_traders=10,
+    seed_shares=10.0,
+    trade_size=1.0,
+    sell_probability=0.3,
+    seed=None,
+):
+    """
+    Simulates `n_paths` markets where agent 0 seeds `seed_shares` of both long
+    and short shares and then `n_traders` other agents trade at random.
+    Each step one random trader on each path buys an exponentially distributed
+    number of shares on a random side or sells part of what they hold. Paths
+    are then settled at a lognormal price and everyone redeems
+
+    Returns a dict of arrays with one value per path
+    """
+    rng = np.random.default_rng(seed)
+    sim = MarketSimulator(n_paths, n_traders + 1, alpha, is_put, strike_price)
+    sim.buy(0, seed_shares, seed_shares)
+
+    volume = np.zeros(n_paths)
+    for _ in range(n_steps):
+        agents = rng.integers(1, n_traders + 1, n_paths)
+        is_long = rng.random(n_paths) < 0.5
+        is_sell = rng.random(n_paths) < sell_probability
+        shares = rng.exponential(trade_size, n_paths)
+
+        buy_shares = np.where(is_sell, 0.0, shares)
+        volume += sim.buy(
+            agents,
+            np.where(is_long, buy_shares, 0.0),
+            np.where(is_long, 0.0, buy_shares),
+        )
+
+        # sell a random fraction of the chosen side
+        rows = np.arange(n_paths)
+        held = np.where(
+            is_long, sim.long_balances[rows, agents], sim.short_balances[rows, agents]
+        )
+        sell_shares = np.where(is_sell, held * rng.random(n_paths), 0.0)
+        volume += sim.sell(
+            agents,
+            np.where(is_long, sell_shares, 0.0),
+            np.where(is_long, 0.0, sell_shares),
+        )
+
+    z = rng.standard_normal(n_paths)
+    t = expiry_years
+    price = spot_price * np.exp(volatility * np.sqrt(t) * z - volatility ** 2 * t / 2)
+
+    balance = sim.balance.copy()
+    long_supply, short_supply = sim.long_supply, sim.short_supply
+    sim.settle(price)
+    liability = sim.liability()
+    spread = sim.spread()
+    payouts = sim.redeem()
+
+    return {
+        "settlement_price": price,
+        "long_supply": long_supply,
+        "short_supply": short_supply,
+        "volume": volume,
+        "balance": balance,
+        "liability": liability,
+        "spread": spread,
+        "seed_pnl": sim.cash[:, 0],
+        "trader_pnl": sim.cash[:, 1:].sum(axis=1),
+        "payouts": payouts.sum(axis=1),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    n_paths, liquidity_param = int(sys.argv[1]), float(sys.argv[2])
+    is_put = len(sys.argv) > 3 and sys.argv[3].lower() in ["1", "true", "put"]
+
+    alpha = liquidity_param / 2.0 / np.log(2.0)
+    results = simulate(n_paths, alpha, is_put=is_put, seed=0)
+
+    print(f"{'':<18} {'mean':>10} {'5%':>10} {'50%':>10} {'95%':>10}")
+    for name, values in results.items():
+        q = np.percentile(values, [5, 50, 95])
+        print(
+            f"{name:<18} {values.mean():>10.4f} {q[0]:>10.4f} {q[1]:>10.4f} {q[2]:>10.4f}"
+        )
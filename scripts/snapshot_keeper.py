@@ -0,0 +1,178 @@
+"""
+Keeper that calls `takeSnapshot` on every UniswapOracle just before its
+`startTime` and then claims the oracle's rewards with `claimReward`
+
+`takeSnapshot` reverts once a block's timestamp is after `startTime`, so each
+snapshot is sent `LEAD_TIME` seconds before `startTime` so that it's mined in
+one of the last blocks before it. Oracles are kept in a priority queue ordered
+by when they're due, so one process can look after hundreds of them. Reward
+tokens in `REWARD_TOKENS` are claimed after `startTime` if the keeper was the
+last to take a snapshot
+
+In dry-run mode transactions are only simulated with `eth_call` at the time
+they would have been sent, e.g. against a local fork. Claims after a simulated
+snapshot can't be simulated since the snapshot wasn't taken, so they're only
+reported
+
+Usage:
+>> brownie run snapshot_keeper --network mainnet
+>> brownie run snapshot_keeper main dry --network mainnet-fork
+
+"""
+
+import asyncio
+import heapq
+
+from brownie import accounts, network, UniswapOracle
+
+from scripts.keeper import ChainClock, NonceManager, contract, run, wait
+from scripts.rpc_batch import batch_call
+
+
+ACCOUNT = "keeper"
+
+# send snapshots this many seconds before `startTime`. should be enough for
+# the transaction to be mined in a block before `startTime`
+BLOCK_TIME = 13
+LEAD_TIME = 2 * BLOCK_TIME
+
+REWARD_TOKENS = {
+    "mainnet": [],
+    "rinkeby": [],
+}
+
+SNAPSHOT = "takeSnapshot"
+CLAIM = "claimReward"
+
+
+class SnapshotKeeper:
+    def __init__(self, account, reward_tokens, dry_run=False):
+        self.account = account
+        self.reward_tokens = reward_tokens
+        self.dry_run = dry_run
+        self.nonces = NonceManager(account)
+        self.clock = ChainClock()
+
+        # heap of (due time, action, oracle address)
+        self.queue = []
+
+        # web3 contracts keyed by address, which can be used from worker threads
+        self.oracles = {}
+        self.start_times = {}
+        self.simulated_snapshots = set()
+        self.tasks = []
+
+    def load(self, oracles, now):
+        """
+        Schedule snapshots for `oracles` whose window hasn't started and claims
+        for oracles whose last snapshot was taken by this keeper
+        """
+        addresses = [oracle.address for oracle in oracles]
+        calls = [
+            (address, UniswapOracle.abi, name, ())
+            for address in addresses
+            for name in ["startTime", "snapshotCaller"]
+        ]
+        results = batch_call(calls)
+
+        for i, address in enumerate(addresses):
+            start_time, caller = results[2 * i], results[2 * i + 1]
+            self.oracles[address] = contract(address, UniswapOracle)
+            self.start_times[address] = start_time
+            if start_time >= now:
+                self.schedule(start_time - LEAD_TIME, SNAPSHOT, address)
+            elif caller == self.account.address and self.reward_tokens:
+                self.schedule(start_time + 1, CLAIM, address)
+
+    def schedule(self, due, action, address):
+        heapq.heappush(self.queue, (due, action, address))
+
+    async def send(self, fn):
+        """
+        Send a transaction calling `fn` and return its receipt and block
+        timestamp, or only simulate it and return None in dry-run mode
+        """
+        if self.dry_run:
+            await run(fn.call, {"from": self.account.address})
+            return None
+        return await wait(await self.nonces.send(fn))
+
+    async def take_snapshot(self, address):
+        start_time = self.start_times[address]
+        try:
+            result = await self.send(self.oracles[address].functions.takeSnapshot())
+        except Exception as e:
+            print(f"{address}: snapshot failed: {e}")
+            return
+
+        if result is None:
+            self.simulated_snapshots.add(address)
+            print(f"{address}: snapshot would succeed")
+        else:
+            _, timestamp = result
+            print(f"{address}: snapshot mined {start_time - timestamp}s before start")
+        if self.reward_tokens:
+            self.schedule(start_time + 1, CLAIM, address)
+
+    async def claim_rewards(self, address):
+        oracle = self.oracles[address]
+
+        # snapshot was only simulated so snapshotCaller isn't this keeper and
+        # claimReward would revert. report the claims that would be sent
+        if address in self.simulated_snapshots:
+            for token in self.reward_tokens:
+                print(f"{address}: would claim {token}")
+            return
+
+        # someone else could have taken a snapshot after us
+        caller = await run(oracle.functions.snapshotCaller().call)
+        if caller != self.account.address:
+            print(f"{address}: not last snapshot caller. Not claiming")
+            return
+
+        for token in self.reward_tokens:
+            try:
+                result = await self.send(oracle.functions.claimReward(token))
+            except Exception as e:
+                print(f"{address}: claim of {token} failed: {e}")
+                continue
+            if result is None:
+                print(f"{address}: claim of {token} would succeed")
+            else:
+                print(f"{address}: claimed {token}")
+
+    async def run(self):
+        while self.queue:
+            due, action, address = self.queue[0]
+            if await self.clock.now() < due:
+                await self.clock.sleep_until(due)
+                continue
+
+            heapq.heappop(self.queue)
+            f = self.take_snapshot if action == SNAPSHOT else self.claim_rewards
+            self.tasks.append(asyncio.ensure_future(f(address)))
+
+            # claims are scheduled by snapshot tasks so keep going until
+            # they've finished
+            if not self.queue:
+                await asyncio.gather(*self.tasks)
+                self.tasks = []
+
+
+def main(mode=None):
+    dry_run = mode == "dry"
+    account = accounts[0] if dry_run else accounts.load(ACCOUNT)
+    reward_tokens = REWARD_TOKENS.get(network.show_active(), [])
+    if not reward_tokens:
+        print(f"No reward tokens for {network.show_active()}. Not claiming")
+
+    keeper = SnapshotKeeper(account, reward_tokens, dry_run)
+    loop = asyncio.get_event_loop()
+    now = loop.run_until_complete(keeper.clock.now())
+    keeper.load(UniswapOracle, now)
+
+    print(f"{len(keeper.queue)} actions scheduled")
+    for due, action, address in sorted(keeper.queue):
+        print(f"  {due - now:>10.0f}s  {action}  {address}")
+
+    loop.run_until_complete(keeper.run())
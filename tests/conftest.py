@@ -1,6 +1,94 @@
 from brownie import chain
+from math import log
 import pytest
 
+try:
+    from xdist.scheduler import LoadScopeScheduling
+except ImportError:
+    LoadScopeScheduling = None
+
+
+# when running tests in parallel with `brownie test -n <workers>`, tests from
+# the same module are sent to workers in chunks of this size. large modules are
+# spread over all workers while module-scoped deployments are still reused
+# within each chunk
+XDIST_CHUNK_SIZE = 8
+
+SCALE = 10 ** 18
+EXPIRY_TIME = 2000000000  # 18 May 2033
+ALPHA = int(SCALE // 10 // 2 / log(2))
+STRIKE_PRICE = 100 * SCALE
+
+CALL = 0
+PUT = 1
+
+
+# contracts deployed in module-scoped fixtures are shared by all tests in the
+# module. tests that use the chain are marked with
+# `pytest.mark.usefixtures("isolation")` so the chain is reset after each module
+# and reverted after each test. tests of pure python code aren't marked so they
+# don't need a chain
+@pytest.fixture
+def isolation(module_isolation, fn_isolation):
+    pass
+
+
+@pytest.fixture(scope="session")
+def deploy_market(OptionsMarketMaker, OptionsToken):
+    def f(deployer, base_token, oracle, is_put, strike_price, alpha, expiry_time):
+        mm = deployer.deploy(OptionsMarketMaker)
+        longToken = deployer.deploy(OptionsToken)
+        shortToken = deployer.deploy(OptionsToken)
+
+        longToken.initialize(mm, "long name", "long symbol", 18)
+        shortToken.initialize(mm, "short name", "short symbol", 18)
+        mm.initialize(
+            base_token,
+            oracle,
+            is_put,
+            strike_price,
+            alpha,
+            expiry_time,
+            longToken,
+            shortToken,
+        )
+        return mm
+
+    return f
+
+
+@pytest.fixture(scope="module")
+def deployer(accounts):
+    return accounts[0]
+
+
+@pytest.fixture(scope="module")
+def users(accounts):
+    return accounts[1:6]
+
+
+@pytest.fixture(scope="module")
+def oracle(MockOracle, deployer):
+    return deployer.deploy(MockOracle)
+
+
+# (market, base token) for a call and a put market keyed by `isPutMarket`, with
+# strike price 100 and alpha 0.1 / 2 / log 2. all users have 10^9 base tokens
+# approved for their market
+@pytest.fixture(scope="module")
+def markets(deploy_market, MockToken, oracle, deployer, users):
+    markets = {}
+    for is_put in [CALL, PUT]:
+        base_token = deployer.deploy(MockToken)
+        mm = deploy_market(
+            deployer, base_token, oracle, is_put, STRIKE_PRICE, ALPHA, EXPIRY_TIME
+        )
+        for u in users:
+            base_token.mint(u, 10 ** 9 * SCALE, {"from": deployer})
+            base_token.approve(mm, 10 ** 9 * SCALE, {"from": u})
+        markets[is_put] = (mm, base_token)
+    return markets
+
 
 @pytest.fixture
 def fast_forward():
@@ -9,6 +97,36 @@ def fast_forward():
         assert sleep_time > 0
         chain.sleep(sleep_time)
 
-    chain.snapshot()
-    yield f
-    chain.revert()
+    return f
+
+
+if LoadScopeScheduling is not None:
+
+    class ModuleChunkScheduling(LoadScopeScheduling):
+        """
+        Splits each module into consecutive chunks of `XDIST_CHUNK_SIZE` tests
+        in collection order, so the assignment of tests to chunks is the same
+        on every run
+        """
+
+        def __init__(self, config, log=None):
+            super().__init__(config, log)
+            self.scopes = {}
+            self.counts = {}
+
+        def _split_scope(self, nodeid):
+            if nodeid not in self.scopes:
+                module = nodeid.split("::", 1)[0]
+                index = self.counts.get(module, 0)
+                self.counts[module] = index + 1
+                self.scopes[nodeid] = f"{module}::{index // XDIST_CHUNK_SIZE}"
+            return self.scopes[nodeid]
+
+
+# only replaces xdist's default `--dist load` scheduler. other `--dist` modes
+# keep their own schedulers
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config, log):
+    if LoadScopeScheduling is None or config.getoption("dist") != "load":
+        return None
+    return ModuleChunkScheduling(config, log)
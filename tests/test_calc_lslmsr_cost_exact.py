@@ -0,0 +1,88 @@
+from math import log
+import pytest
+import random
+
+from scripts.calc_lslmsr_cost_exact import calc_lslmsr_cost, cost
+
+
+SCALE = 10 ** 18
+ALPHA = int(SCALE // 10 // 2 / log(2))
+STRIKE_PRICE = 100 * SCALE
+
+CALL = 0
+PUT = 1
+
+
+def test_calc_lslmsr_cost():
+
+    # same constants as `test_calc_lslmsr_cost` in test_options_market_maker.py
+    alpha = int(SCALE // 10 // 2 // log(2))
+    assert calc_lslmsr_cost(0, 0, alpha) == 0
+    assert calc_lslmsr_cost(1, 0, alpha) == 1000000068793027542
+    assert calc_lslmsr_cost(0, 1, alpha) == 1000000068793027542
+    assert calc_lslmsr_cost(1, 1, alpha) == 1100000000000000007
+    assert (
+        calc_lslmsr_cost(1 * SCALE, 1 * SCALE, alpha)
+        == 1100000000000000007801447287920083588
+    )
+    assert (
+        calc_lslmsr_cost(5 * SCALE, 5 * SCALE, alpha)
+        == 5500000000000000039007236439600417943
+    )
+    assert (
+        calc_lslmsr_cost(3 * SCALE, 11 * SCALE, alpha)
+        == 11000366311880366618741971338433052667
+    )
+    assert (
+        calc_lslmsr_cost(10 ** 12 * SCALE, 5 * SCALE, alpha)
+        == 1000000068793027551929301695942633118558265113489
+    )
+
+    alpha = int(SCALE // 10 ** 12 // 2 // log(2))
+    assert (
+        calc_lslmsr_cost(1 * SCALE, 1 * SCALE, alpha)
+        == 1000000000000999999278510749738162706
+    )
+
+    alpha = int(SCALE * 10 ** 12 // 2 // log(2))
+    assert (
+        calc_lslmsr_cost(1 * SCALE, 1 * SCALE, alpha)
+        == 1000000000001000136983480685343088851928710937500
+    )
+
+
+def test_cost():
+    alpha = int(SCALE // 10 // 2 // log(2))
+    assert cost(3 * SCALE, 11 * SCALE, alpha) == 11000366311880366618
+    assert (
+        cost(3 * SCALE, 11 * SCALE, alpha, True, STRIKE_PRICE) == 1100036631188036661874
+    )
+
+
+@pytest.mark.usefixtures("isolation")
+def test_calc_lslmsr_cost_matches_contract(markets):
+    mm = markets[CALL][0]
+    rng = random.Random(0)
+    for _ in range(20):
+        q1 = rng.randrange(10 ** rng.randrange(1, 31))
+        q2 = rng.randrange(10 ** rng.randrange(1, 31))
+        alpha = rng.randrange(1, 10 ** rng.randrange(1, 21))
+        assert mm.calcLsLmsrCost(q1, q2, alpha) == calc_lslmsr_cost(q1, q2, alpha)
+
+
+@pytest.mark.parametrize("is_put", [CALL, PUT])
+@pytest.mark.usefixtures("isolation")
+def test_cost_matches_contract(markets, OptionsToken, users, is_put):
+    mm = markets[is_put][0]
+    long_token = OptionsToken.at(mm.longToken())
+    short_token = OptionsToken.at(mm.shortToken())
+
+    rng = random.Random(is_put)
+    for _ in range(5):
+        long_shares = rng.randrange(1, 10 * SCALE)
+        short_shares = rng.randrange(1, 10 * SCALE)
+        mm.buy(long_shares, short_shares, 10 ** 9 * SCALE, {"from": users[0]})
+
+        long_supply = long_token.totalSupply()
+        short_supply = short_token.totalSupply()
+        assert mm.cost() == cost(long_supply, short_supply, ALPHA, is_put, STRIKE_PRICE)
@@ -0,0 +1,52 @@
+from math import log
+import pytest
+import random
+
+from scripts.calc_payouts import calc_payouts
+
+
+pytestmark = pytest.mark.usefixtures("isolation")
+
+
+SCALE = 10 ** 18
+EXPIRY_TIME = 2000000000  # 18 May 2033
+ALPHA = int(SCALE // 10 // 2 / log(2))
+STRIKE_PRICE = 100 * SCALE
+
+CALL = 0
+PUT = 1
+
+
+@pytest.mark.parametrize("is_put", [CALL, PUT])
+@pytest.mark.parametrize("settlement_price", [60 * SCALE, 100 * SCALE, 125 * SCALE])
+def test_calc_payouts_matches_contract(
+    markets, OptionsToken, oracle, users, fast_forward, is_put, settlement_price
+):
+    mm, base_token = markets[is_put]
+    long_token = OptionsToken.at(mm.longToken())
+    short_token = OptionsToken.at(mm.shortToken())
+
+    rng = random.Random(is_put)
+    for u in users:
+        long_shares = rng.randrange(10 * SCALE)
+        short_shares = rng.randrange(1, 10 * SCALE)
+        mm.buy(long_shares, short_shares, 10 ** 9 * SCALE, {"from": u})
+
+    oracle.setPrice(settlement_price)
+    fast_forward(EXPIRY_TIME)
+    mm.settle({"from": users[0]})
+
+    longs = [long_token.balanceOf(u) for u in users]
+    shorts = [short_token.balanceOf(u) for u in users]
+    payouts = calc_payouts(
+        longs,
+        shorts,
+        base_token.balanceOf(mm),
+        long_token.totalSupply(),
+        short_token.totalSupply(),
+        settlement_price,
+        STRIKE_PRICE,
+        is_put,
+    )
+    for long_shares, short_shares, payout in zip(longs, shorts, payouts):
+        assert payout == mm.calcPayoff(long_shares, short_shares)
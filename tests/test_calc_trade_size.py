@@ -0,0 +1,74 @@
+from math import log
+import numpy as np
+import pytest
+
+from scripts.calc_lslmsr_cost_exact import cost
+from scripts.calc_trade_size import calc_buy_shares, calc_sell_shares
+from scripts.newton import solve_bracketed
+
+
+SCALE = 10 ** 18
+ALPHA = int(SCALE // 10 // 2 / log(2))
+STRIKE_PRICE = 100 * SCALE
+
+SUPPLIES = [(0, 0), (3 * SCALE, 11 * SCALE), (10 ** 6 * SCALE, 5 * SCALE)]
+
+
+def test_solve_bracketed():
+    targets = np.array([0.0, 1e-9, 2.0, 7.5, 26.9])
+    x = solve_bracketed(
+        lambda x: (x ** 3 - targets, 3 * x ** 2),
+        np.zeros(5),
+        np.full(5, 4.0),
+        np.full(5, 2.0),
+        1e-14,
+        200,
+    )
+    assert np.allclose(x ** 3, targets, rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("long_supply,short_supply", SUPPLIES)
+@pytest.mark.parametrize("is_long", [True, False])
+@pytest.mark.parametrize("is_put", [False, True])
+def test_calc_buy_shares(long_supply, short_supply, is_long, is_put):
+    unit = STRIKE_PRICE if is_put else SCALE
+    budgets = [0, 1, unit // 1000, unit, 50 * unit]
+    shares = calc_buy_shares(
+        long_supply, short_supply, ALPHA, budgets, is_long, is_put, STRIKE_PRICE
+    )
+
+    def buy_cost(s):
+        qs = [long_supply, short_supply]
+        qs[0 if is_long else 1] += s
+        c0 = cost(long_supply, short_supply, ALPHA, is_put, STRIKE_PRICE)
+        return cost(qs[0], qs[1], ALPHA, is_put, STRIKE_PRICE) - c0
+
+    for budget, s in zip(budgets, shares):
+        assert buy_cost(s) <= budget < buy_cost(s + 1)
+
+
+@pytest.mark.parametrize("long_supply,short_supply", SUPPLIES[1:])
+@pytest.mark.parametrize("is_long", [True, False])
+@pytest.mark.parametrize("is_put", [False, True])
+def test_calc_sell_shares(long_supply, short_supply, is_long, is_put):
+    unit = STRIKE_PRICE if is_put else SCALE
+    amounts_out = [0, 1, unit // 1000, unit, 10 ** 9 * unit]
+    shares = calc_sell_shares(
+        long_supply, short_supply, ALPHA, amounts_out, is_long, is_put, STRIKE_PRICE
+    )
+
+    def sell_value(s):
+        qs = [long_supply, short_supply]
+        qs[0 if is_long else 1] -= s
+        c0 = cost(long_supply, short_supply, ALPHA, is_put, STRIKE_PRICE)
+        return c0 - cost(qs[0], qs[1], ALPHA, is_put, STRIKE_PRICE)
+
+    # amounts worth more than the whole supply can't be reached
+    supply = long_supply if is_long else short_supply
+    assert shares[-1] is None
+    for amount_out, s in zip(amounts_out, shares):
+        if s is None:
+            assert sell_value(supply) < amount_out
+        else:
+            assert sell_value(s) >= amount_out
+            assert s == 0 or sell_value(s - 1) < amount_out
@@ -1,4 +1,8 @@
 from brownie import reverts
+import pytest
+
+
+pytestmark = pytest.mark.usefixtures("isolation")
 
 
 def test_one_feed(ChainlinkOracle, MockAggregatorV3Interface, accounts):
@@ -1,4 +1,8 @@
 from brownie import reverts
+import pytest
+
+
+pytestmark = pytest.mark.usefixtures("isolation")
 
 
 def test_charm_token(CharmToken, accounts):
@@ -0,0 +1,45 @@
+import pytest
+
+from scripts.index_holders import HolderIndex, ZERO_ADDRESS
+
+
+TOKEN = "0x0000000000000000000000000000000000000001"
+ALICE = "0x000000000000000000000000000000000000000A"
+BOB = "0x000000000000000000000000000000000000000b"
+
+
+def transfer(sender, recipient, value):
+    return {
+        "address": TOKEN,
+        "args": {"from": sender, "to": recipient, "value": value},
+    }
+
+
+@pytest.fixture
+def index():
+    index = HolderIndex()
+    index.add_tokens([TOKEN])
+    return index
+
+
+def test_apply(index):
+    index.apply(transfer(ZERO_ADDRESS, ALICE, 10))
+    index.apply(transfer(ALICE, BOB, 4))
+    assert index.balances[TOKEN] == {ALICE: 6, BOB: 4}
+    assert index.total_supply(TOKEN) == 10
+
+    # holders are removed when their balance drops to 0
+    index.apply(transfer(ALICE, ZERO_ADDRESS, 6))
+    assert index.balances[TOKEN] == {BOB: 4}
+
+    with pytest.raises(ValueError):
+        index.apply(transfer(ALICE, BOB, 1))
+
+
+def test_apply_zero_value(index):
+    index.apply(transfer(ALICE, BOB, 0))
+    assert index.balances[TOKEN] == {}
+
+    index.apply(transfer(ZERO_ADDRESS, ALICE, 5))
+    index.apply(transfer(ALICE, BOB, 0))
+    assert index.balances[TOKEN] == {ALICE: 5}
@@ -4,6 +4,9 @@ import pytest
 import time
 
 
+pytestmark = pytest.mark.usefixtures("isolation")
+
+
 SCALE = 10 ** 18
 EXPIRY_TIME = 2000000000  # 18 May 2033
 ALPHA = int(SCALE // 10 // 2 / log(2))
@@ -12,60 +15,41 @@ CALL = 0
 PUT = 1
 
 
-@pytest.fixture
-def deployer(accounts):
-    return accounts[0]
-
-
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user(accounts):
     return accounts[1]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user2(accounts):
     return accounts[2]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user3(accounts):
     return accounts[3]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def base_token(MockToken, deployer):
     return deployer.deploy(MockToken)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def usd_token(MockToken, deployer):
     return deployer.deploy(MockToken)
 
 
-@pytest.fixture
-def oracle(deployer, MockOracle):
-    return deployer.deploy(MockOracle)
-
-
-@pytest.fixture
-def mm(
-    OptionsMarketMaker, OptionsToken, base_token, oracle, deployer, user, user2, user3
-):
-    mm = deployer.deploy(OptionsMarketMaker)
-    longToken = deployer.deploy(OptionsToken)
-    shortToken = deployer.deploy(OptionsToken)
-
-    longToken.initialize(mm, "long name", "long symbol", 18)
-    shortToken.initialize(mm, "short name", "short symbol", 18)
-    mm.initialize(
+@pytest.fixture(scope="module")
+def mm(deploy_market, base_token, oracle, deployer, user, user2, user3):
+    mm = deploy_market(
+        deployer,
         base_token,
         oracle,
         CALL,
         100 * SCALE,  # strikePrice = 100 usd
         ALPHA,  # alpha = 0.1 / 2 / log 2
         EXPIRY_TIME,
-        longToken,
-        shortToken,
     )
 
     # mint 100 tokens to all users
@@ -76,47 +60,30 @@ def mm(
     return mm
 
 
-@pytest.fixture
-def ethmm(OptionsMarketMaker, OptionsToken, oracle, deployer):
+@pytest.fixture(scope="module")
+def ethmm(deploy_market, oracle, deployer):
     zero_address = "0x0000000000000000000000000000000000000000"
-    mm = deployer.deploy(OptionsMarketMaker)
-    longToken = deployer.deploy(OptionsToken)
-    shortToken = deployer.deploy(OptionsToken)
-
-    longToken.initialize(mm, "long name", "long symbol", 18)
-    shortToken.initialize(mm, "short name", "short symbol", 18)
-    mm.initialize(
+    return deploy_market(
+        deployer,
         zero_address,  # eth
         oracle,
         CALL,
         100 * SCALE,  # strikePrice = 100 usd
         ALPHA,  # alpha = 0.1 / 2 / log 2
         EXPIRY_TIME,
-        longToken,
-        shortToken,
     )
-    return mm
-
 
-@pytest.fixture
-def putmm(
-    OptionsMarketMaker, OptionsToken, usd_token, oracle, deployer, user, user2, user3
-):
-    mm = deployer.deploy(OptionsMarketMaker)
-    longToken = deployer.deploy(OptionsToken)
-    shortToken = deployer.deploy(OptionsToken)
 
-    longToken.initialize(mm, "long name", "long symbol", 18)
-    shortToken.initialize(mm, "short name", "short symbol", 18)
-    mm.initialize(
+@pytest.fixture(scope="module")
+def putmm(deploy_market, usd_token, oracle, deployer, user, user2, user3):
+    mm = deploy_market(
+        deployer,
         usd_token,
         oracle,
         PUT,
         100 * SCALE,  # strikePrice = 100 usd
         ALPHA,  # alpha = 0.1 / 2 / log 2
         EXPIRY_TIME,
-        longToken,
-        shortToken,
     )
 
     # mint 10000 tokens to all users
@@ -127,12 +94,12 @@ def putmm(
     return mm
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def long_token(OptionsToken, mm):
     return OptionsToken.at(mm.longToken())
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def short_token(OptionsToken, mm):
     return OptionsToken.at(mm.shortToken())
 
@@ -0,0 +1,81 @@
+import itertools
+from math import log
+
+from scripts.quote_stake import calc_stake_cost, calc_worst_supplies, quote_stake
+
+
+SCALE = 10 ** 18
+ALPHA = int(SCALE // 10 // 2 / log(2))
+STRIKE_PRICE = 100 * SCALE
+
+
+def brute_force(long_supply, short_supply, shares, pending, is_put=False):
+    """
+    Max cost of staking `shares` over every order of every subset of `pending`
+    where no trade would sell more than the supply
+    """
+    worst = 0
+    for n in range(len(pending) + 1):
+        for trades in itertools.permutations(pending, n):
+            q1, q2 = long_supply, short_supply
+            for d1, d2 in trades:
+                q1, q2 = q1 + d1, q2 + d2
+                if q1 < 0 or q2 < 0:
+                    break
+            else:
+                amount_in = calc_stake_cost(q1, q2, ALPHA, shares, is_put, STRIKE_PRICE)
+                worst = max(worst, amount_in)
+    return worst
+
+
+def worst_cost(long_supply, short_supply, shares, pending, is_put=False):
+    q1, q2 = calc_worst_supplies(
+        long_supply, short_supply, ALPHA, shares, pending, is_put, STRIKE_PRICE
+    )
+    return calc_stake_cost(q1, q2, ALPHA, shares, is_put, STRIKE_PRICE)
+
+
+def test_quote_stake():
+    quotes = quote_stake(10 * SCALE, 5 * SCALE, ALPHA, [SCALE, 2 * SCALE])
+    for shares, (amount_in, max_amount_in) in zip([SCALE, 2 * SCALE], quotes):
+        assert amount_in == max_amount_in
+        assert amount_in == calc_stake_cost(
+            10 * SCALE, 5 * SCALE, ALPHA, shares, False, None
+        )
+
+    # buffer is rounded up
+    ((amount_in, max_amount_in),) = quote_stake(
+        10 * SCALE, 5 * SCALE, ALPHA, [SCALE], buffer_bps=50
+    )
+    assert max_amount_in == amount_in + -(-amount_in * 50 // 10000)
+
+
+def test_trade_that_only_increases_cost_after_others():
+
+    # selling 4 long on its own makes the stake cheaper, but it's part of the
+    # most expensive subset
+    pending = [(-4 * SCALE, 9 * SCALE), (14 * SCALE, 0), (0, 14 * SCALE)]
+    for is_put in [False, True]:
+        expected = brute_force(13 * SCALE, 14 * SCALE, SCALE, pending, is_put)
+        assert worst_cost(13 * SCALE, 14 * SCALE, SCALE, pending, is_put) == expected
+
+
+def test_sell_only_possible_after_buy():
+
+    # selling 5 long is only possible if the buy is mined first. the buy on its
+    # own makes the stake cheaper but both together make it most expensive
+    pending = [(-5 * SCALE, 0), (4 * SCALE, 0)]
+    expected = calc_stake_cost(2 * SCALE, SCALE, ALPHA, SCALE, False, None)
+    assert brute_force(3 * SCALE, SCALE, SCALE, pending) == expected
+    assert worst_cost(3 * SCALE, SCALE, SCALE, pending) == expected
+
+
+def test_many_pending_trades():
+    pending = [((-1) ** i * i * SCALE, (i % 3) * SCALE) for i in range(20)]
+    q1, q2 = calc_worst_supplies(
+        10 * SCALE, 10 * SCALE, ALPHA, SCALE, pending, False, None
+    )
+    assert q1 >= 0 and q2 >= 0
+    assert calc_stake_cost(q1, q2, ALPHA, SCALE, False, None) >= calc_stake_cost(
+        10 * SCALE, 10 * SCALE, ALPHA, SCALE, False, None
+    )
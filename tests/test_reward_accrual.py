@@ -0,0 +1,88 @@
+import pytest
+
+from scripts.reward_accrual import EVENTS, RewardAccrual
+
+
+SCALE = 10 ** 18
+DAYS = 24 * 60 * 60
+TIME1 = 2000000000
+
+
+@pytest.mark.usefixtures("isolation")
+def test_reward_accrual_matches_contract(
+    StakingRewards, MockToken, fast_forward, deployer, users
+):
+    user, user2 = users[:2]
+
+    fast_forward(TIME1 - 1 * DAYS)
+    rewards_token = deployer.deploy(MockToken)
+    staking_token = deployer.deploy(MockToken)
+    sr = deployer.deploy(
+        StakingRewards,
+        deployer,
+        deployer,
+        rewards_token,
+        staking_token,
+    )
+    rewards_token.mint(sr, 2000 * SCALE, {"from": deployer})
+    for u in [user, user2]:
+        staking_token.mint(u, 100 * SCALE, {"from": deployer})
+        staking_token.approve(sr, 100 * SCALE, {"from": u})
+
+    events = []
+
+    def check(tx):
+        for event in tx.events:
+            if event.address == sr.address and event.name in EVENTS:
+                events.append((event.name, dict(event), tx.timestamp))
+
+        accrual = RewardAccrual()
+        (earned,) = accrual.replay(events, [tx.timestamp])
+        assert accrual.mismatches == []
+        for u in [user, user2]:
+            i = accrual.accounts.get(u.address)
+            expected = sr.earned(u, block_identifier=tx.block_number)
+            assert (earned[i] if i is not None else 0) == expected
+            if i is not None:
+                assert accrual.claimed[i] == rewards_token.balanceOf(u)
+                assert accrual.balances[i] == sr.balanceOf(u)
+
+    check(sr.setRewardsDuration(10 * DAYS, {"from": deployer}))
+    check(sr.stake(10 * SCALE, {"from": user}))
+
+    fast_forward(TIME1)
+    check(sr.notifyRewardAmount(700 * SCALE, {"from": deployer}))
+
+    fast_forward(TIME1 + 1 * DAYS)
+    check(sr.stake(30 * SCALE, {"from": user2}))
+
+    # more rewards added before the period ends so the leftover is carried over
+    fast_forward(TIME1 + 3 * DAYS)
+    check(sr.notifyRewardAmount(500 * SCALE, {"from": deployer}))
+
+    fast_forward(TIME1 + 5 * DAYS)
+    check(sr.getReward({"from": user}))
+
+    fast_forward(TIME1 + 6 * DAYS)
+    check(sr.withdraw(10 * SCALE, {"from": user2}))
+
+    fast_forward(TIME1 + 8 * DAYS)
+    check(sr.exit({"from": user}))
+
+    # period has ended
+    fast_forward(TIME1 + 20 * DAYS)
+    check(sr.getReward({"from": user2}))
+    check(sr.setRewardsDuration(7 * DAYS, {"from": deployer}))
+    check(sr.notifyRewardAmount(100 * SCALE, {"from": deployer}))
+
+    fast_forward(TIME1 + 22 * DAYS)
+    check(sr.stake(5 * SCALE, {"from": user}))
+
+
+def test_earned_before_last_event():
+    accrual = RewardAccrual()
+    accrual.apply("Staked", {"user": "0x1", "amount": SCALE}, 100)
+    with pytest.raises(ValueError):
+        accrual.earned(99)
+    with pytest.raises(ValueError):
+        accrual.apply("Staked", {"user": "0x1", "amount": SCALE}, 99)
@@ -3,6 +3,9 @@ from math import log
 import pytest
 
 
+pytestmark = pytest.mark.usefixtures("isolation")
+
+
 SCALE = 10 ** 18
 EXPIRY_TIME = 2000000000  # 18 May 2033
 ALPHA = int(SCALE // 10 // 2 / log(2))
@@ -14,41 +17,62 @@ CALL = 0
 PUT = 1
 
 
-def test_seed_rewards(
-    SeedRewards,
-    OptionsMarketMaker,
-    OptionsToken,
-    MockOracle,
-    MockToken,
-    accounts,
-    fast_forward,
-):
-    deployer, user = accounts[:2]
+@pytest.fixture(scope="module")
+def user(accounts):
+    return accounts[1]
 
-    oracle = deployer.deploy(MockOracle)
-    base_token = deployer.deploy(MockToken)
 
-    mm = deployer.deploy(OptionsMarketMaker)
-    longToken = deployer.deploy(OptionsToken)
-    shortToken = deployer.deploy(OptionsToken)
+@pytest.fixture(scope="module")
+def base_token(MockToken, deployer):
+    return deployer.deploy(MockToken)
 
-    longToken.initialize(mm, "long name", "long symbol", 18)
-    shortToken.initialize(mm, "short name", "short symbol", 18)
-    mm.initialize(
+
+@pytest.fixture(scope="module")
+def rewards_token(MockToken, deployer):
+    return deployer.deploy(MockToken)
+
+
+@pytest.fixture(scope="module")
+def mm(deploy_market, base_token, oracle, deployer):
+    return deploy_market(
+        deployer,
         base_token,
         oracle,
         CALL,
         100 * SCALE,  # strikePrice = 100 usd
         ALPHA,  # alpha = 0.1 / 2 / log 2
         EXPIRY_TIME,
-        longToken,
-        shortToken,
     )
-    long_token = OptionsToken.at(mm.longToken())
-    short_token = OptionsToken.at(mm.shortToken())
 
-    rewards_token = deployer.deploy(MockToken)
-    staking_token = deployer.deploy(MockToken)
+
+@pytest.fixture(scope="module")
+def putmm(deploy_market, base_token, oracle, deployer):
+    return deploy_market(
+        deployer,
+        base_token,
+        oracle,
+        PUT,
+        100 * SCALE,  # strikePrice = 100 usd
+        ALPHA,  # alpha = 0.1 / 2 / log 2
+        EXPIRY_TIME,
+    )
+
+
+@pytest.fixture(scope="module")
+def ethmm(deploy_market, oracle, deployer):
+    zero_address = "0x0000000000000000000000000000000000000000"
+    return deploy_market(
+        deployer,
+        zero_address,
+        oracle,
+        CALL,
+        100 * SCALE,  # strikePrice = 100 usd
+        ALPHA,  # alpha = 0.1 / 2 / log 2
+        EXPIRY_TIME,
+    )
+
+
+def deploy_pool(SeedRewards, mm, rewards_token, deployer):
     pool = deployer.deploy(
         SeedRewards,
         mm,
@@ -60,6 +84,37 @@ def test_seed_rewards(
 
     rewards_token.mint(deployer, 1000 * SCALE, {"from": deployer})
     rewards_token.transfer(pool, 1000 * SCALE, {"from": deployer})
+    return pool
+
+
+@pytest.fixture(scope="module")
+def pool(SeedRewards, mm, rewards_token, deployer):
+    return deploy_pool(SeedRewards, mm, rewards_token, deployer)
+
+
+@pytest.fixture(scope="module")
+def put_pool(SeedRewards, putmm, rewards_token, deployer):
+    return deploy_pool(SeedRewards, putmm, rewards_token, deployer)
+
+
+@pytest.fixture(scope="module")
+def eth_pool(SeedRewards, ethmm, rewards_token, deployer):
+    return deploy_pool(SeedRewards, ethmm, rewards_token, deployer)
+
+
+def test_seed_rewards(
+    OptionsToken,
+    mm,
+    pool,
+    base_token,
+    rewards_token,
+    deployer,
+    user,
+    fast_forward,
+):
+    long_token = OptionsToken.at(mm.longToken())
+    short_token = OptionsToken.at(mm.shortToken())
+
     fast_forward(TIME1 + 0 * DAYS)
     pool.notifyRewardAmount(1000 * SCALE)
 
@@ -133,51 +188,19 @@ def test_seed_rewards(
 
 
 def test_seed_rewards_for_put_mm(
-    SeedRewards,
-    OptionsMarketMaker,
     OptionsToken,
-    MockOracle,
-    MockToken,
-    accounts,
+    putmm,
+    put_pool,
+    base_token,
+    rewards_token,
+    deployer,
+    user,
     fast_forward,
 ):
-    deployer, user = accounts[:2]
-
-    oracle = deployer.deploy(MockOracle)
-    base_token = deployer.deploy(MockToken)
-
-    mm = deployer.deploy(OptionsMarketMaker)
-    longToken = deployer.deploy(OptionsToken)
-    shortToken = deployer.deploy(OptionsToken)
-
-    longToken.initialize(mm, "long name", "long symbol", 18)
-    shortToken.initialize(mm, "short name", "short symbol", 18)
-    mm.initialize(
-        base_token,
-        oracle,
-        PUT,
-        100 * SCALE,  # strikePrice = 100 usd
-        ALPHA,  # alpha = 0.1 / 2 / log 2
-        EXPIRY_TIME,
-        longToken,
-        shortToken,
-    )
-    long_token = OptionsToken.at(mm.longToken())
-    short_token = OptionsToken.at(mm.shortToken())
-
-    rewards_token = deployer.deploy(MockToken)
-    staking_token = deployer.deploy(MockToken)
-    pool = deployer.deploy(
-        SeedRewards,
-        mm,
-        deployer,
-        deployer,
-        rewards_token,
-    )
-    pool.setRewardsDuration(10 * DAYS)
+    pool = put_pool
+    long_token = OptionsToken.at(putmm.longToken())
+    short_token = OptionsToken.at(putmm.shortToken())
 
-    rewards_token.mint(deployer, 1000 * SCALE, {"from": deployer})
-    rewards_token.transfer(pool, 1000 * SCALE, {"from": deployer})
     fast_forward(TIME1 + 0 * DAYS)
     pool.notifyRewardAmount(1000 * SCALE)
 
@@ -246,52 +269,17 @@ def test_seed_rewards_for_put_mm(
 
 
 def test_seed_rewards_with_eth(
-    SeedRewards,
-    OptionsMarketMaker,
     OptionsToken,
-    MockOracle,
-    MockToken,
-    accounts,
+    ethmm,
+    eth_pool,
+    rewards_token,
+    user,
     fast_forward,
 ):
-    deployer, user = accounts[:2]
+    pool = eth_pool
+    long_token = OptionsToken.at(ethmm.longToken())
+    short_token = OptionsToken.at(ethmm.shortToken())
 
-    oracle = deployer.deploy(MockOracle)
-    base_token = deployer.deploy(MockToken)
-
-    zero_address = "0x0000000000000000000000000000000000000000"
-    mm = deployer.deploy(OptionsMarketMaker)
-    longToken = deployer.deploy(OptionsToken)
-    shortToken = deployer.deploy(OptionsToken)
-
-    longToken.initialize(mm, "long name", "long symbol", 18)
-    shortToken.initialize(mm, "short name", "short symbol", 18)
-    mm.initialize(
-        zero_address,
-        oracle,
-        CALL,
-        100 * SCALE,  # strikePrice = 100 usd
-        ALPHA,  # alpha = 0.1 / 2 / log 2
-        EXPIRY_TIME,
-        longToken,
-        shortToken,
-    )
-    long_token = OptionsToken.at(mm.longToken())
-    short_token = OptionsToken.at(mm.shortToken())
-
-    rewards_token = deployer.deploy(MockToken)
-    staking_token = deployer.deploy(MockToken)
-    pool = deployer.deploy(
-        SeedRewards,
-        mm,
-        deployer,
-        deployer,
-        rewards_token,
-    )
-    pool.setRewardsDuration(10 * DAYS)
-
-    rewards_token.mint(deployer, 1000 * SCALE, {"from": deployer})
-    rewards_token.transfer(pool, 1000 * SCALE, {"from": deployer})
     fast_forward(TIME1 + 0 * DAYS)
     pool.notifyRewardAmount(1000 * SCALE)
 
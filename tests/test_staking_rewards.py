@@ -2,6 +2,9 @@ from brownie import reverts
 import pytest
 
 
+pytestmark = pytest.mark.usefixtures("isolation")
+
+
 SCALE = 10 ** 18
 DAYS = 24 * 60 * 60
 TIME1 = 2000000000
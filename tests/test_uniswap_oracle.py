@@ -2,6 +2,9 @@ from brownie import reverts
 import pytest
 
 
+pytestmark = pytest.mark.usefixtures("isolation")
+
+
 SCALE = 10 ** 18
 Q112 = 1 << 112
 